@@ -8,7 +8,7 @@ from typing import Optional
 from .config import settings
 from .metrics import history
 from .models import Anomaly, Insights
-from .storage import storage
+from .storage import storage, with_pending_samples
 
 
 @dataclass(frozen=True)
@@ -42,7 +42,7 @@ def compute_insights() -> Insights:
     # Prefer persisted history so baselines survive restarts.
     if storage.enabled:
         try:
-            samples = storage.query_history(window)
+            samples = with_pending_samples(storage.query_history(window), window)
         except Exception:
             samples = history(window)
     else:
@@ -33,6 +33,7 @@ class SQLiteAuthStorage:
         self._db_path = db_path
         self._conn: Optional[sqlite3.Connection] = None
         self._lock = threading.Lock()
+        self._dummy_password_hash: Optional[str] = None
 
     @property
     def enabled(self) -> bool:
@@ -47,6 +48,9 @@ class SQLiteAuthStorage:
         conn = sqlite3.connect(str(path), check_same_thread=False)
         conn.execute("PRAGMA journal_mode=WAL;")
         conn.execute("PRAGMA synchronous=NORMAL;")
+        conn.execute("PRAGMA busy_timeout=5000;")
+        conn.execute("PRAGMA temp_store=MEMORY;")
+        conn.execute("PRAGMA mmap_size=268435456;")
         conn.execute("PRAGMA foreign_keys=ON;")
 
         conn.execute(
@@ -250,6 +254,22 @@ class SQLiteAuthStorage:
         except Exception:
             return False
 
+    def authenticate(self, username: str, plain_password: str) -> Optional[User]:
+        """Look up and verify a login in one call; None on any failure.
+
+        Unknown or inactive users are still checked against a dummy hash so a
+        failed login costs the same PBKDF2 work whether or not the user exists.
+        """
+        user = self.get_user_by_username(username)
+        if user is None or not user.is_active:
+            if self._dummy_password_hash is None:
+                self._dummy_password_hash = self.hash_password(secrets.token_urlsafe(16))
+            self.verify_password(plain_password, self._dummy_password_hash)
+            return None
+        if not self.verify_password(plain_password, user.password_hash):
+            return None
+        return user
+
     def hash_password(self, plain_password: str) -> str:
         iterations = 200_000
         salt = secrets.token_bytes(16)
@@ -396,34 +416,39 @@ class SQLiteAuthStorage:
             last_login=None,
         )
 
-    def update_user(self, user_id: int, **kwargs) -> bool:
-        if not self.enabled:
-            return False
-        conn = self._require_conn()
-        
-        # Build dynamic update query
+    def _user_update_clauses(self, fields: dict) -> tuple[list[str], list]:
+        """SET clauses/params for the user columns present in ``fields``."""
         set_clauses = []
         params = []
         
-        if 'username' in kwargs:
+        if 'username' in fields:
             set_clauses.append("username = ?")
-            params.append(kwargs['username'])
-        if 'password' in kwargs and kwargs['password']:
-            password_hash = self.hash_password(kwargs['password'])
+            params.append(fields['username'])
+        if 'password' in fields and fields['password']:
+            password_hash = self.hash_password(fields['password'])
             set_clauses.append("password_hash = ?")
             params.append(password_hash)
-        if 'role' in kwargs:
+        if 'role' in fields:
             set_clauses.append("role = ?")
-            params.append(kwargs['role'])
-        if 'is_active' in kwargs:
+            params.append(fields['role'])
+        if 'is_active' in fields:
             set_clauses.append("is_active = ?")
-            params.append(1 if kwargs['is_active'] else 0)
-        if 'email' in kwargs:
+            params.append(1 if fields['is_active'] else 0)
+        if 'email' in fields:
             set_clauses.append("email = ?")
-            params.append(kwargs['email'])
-        if 'last_login' in kwargs:
+            params.append(fields['email'])
+        if 'last_login' in fields:
             set_clauses.append("last_login = ?")
-            params.append(kwargs['last_login'])
+            params.append(fields['last_login'])
+        return set_clauses, params
+
+    def update_user(self, user_id: int, **kwargs) -> bool:
+        if not self.enabled:
+            return False
+        conn = self._require_conn()
+        
+        # Build dynamic update query
+        set_clauses, params = self._user_update_clauses(kwargs)
         
         if not set_clauses:
             return False
@@ -439,6 +464,65 @@ class SQLiteAuthStorage:
         
         return conn.total_changes > 0
 
+    def apply_user_update(
+        self, user_id: int, fields: dict, desired_groups: Optional[list[int]] = None
+    ) -> Optional[dict]:
+        """Update user columns and sync group memberships in one transaction.
+
+        ``desired_groups`` of None leaves memberships untouched. Returns None if
+        the user does not exist, else ``{"updated", "added", "removed"}``.
+        """
+        if not self.enabled:
+            return None
+        conn = self._require_conn()
+        # Hash outside the lock; PBKDF2 is the slow part.
+        set_clauses, params = self._user_update_clauses(fields)
+
+        with self._lock:
+            try:
+                if conn.execute("SELECT 1 FROM users WHERE id = ?", (user_id,)).fetchone() is None:
+                    return None
+                updated = False
+                if set_clauses:
+                    cur = conn.execute(
+                        f"UPDATE users SET {', '.join(set_clauses)} WHERE id = ?",
+                        [*params, user_id],
+                    )
+                    updated = cur.rowcount > 0
+                added: list[int] = []
+                removed: list[int] = []
+                if desired_groups is not None:
+                    desired = {int(g) for g in desired_groups}
+                    current = {
+                        int(row[0])
+                        for row in conn.execute(
+                            "SELECT group_id FROM user_group_memberships WHERE user_id = ?",
+                            (user_id,),
+                        ).fetchall()
+                    }
+                    added = sorted(desired - current)
+                    removed = sorted(current - desired)
+                    if removed:
+                        conn.executemany(
+                            "DELETE FROM user_group_memberships WHERE user_id = ? AND group_id = ?",
+                            [(user_id, gid) for gid in removed],
+                        )
+                    if added:
+                        created_at = time.time()
+                        conn.executemany(
+                            """
+                            INSERT OR IGNORE INTO user_group_memberships (user_id, group_id, created_at)
+                            VALUES (?, ?, ?)
+                            """,
+                            [(user_id, gid, created_at) for gid in added],
+                        )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+        return {"updated": updated, "added": added, "removed": removed}
+
     def delete_user(self, user_id: int) -> bool:
         if not self.enabled:
             return False
@@ -590,6 +674,33 @@ class SQLiteAuthStorage:
         
         return conn.total_changes > 0
 
+    def set_user_groups(self, user_id: int, add_ids: list[int], remove_ids: list[int]) -> None:
+        """Apply group membership adds/removes for one user in a single transaction."""
+        if not self.enabled or (not add_ids and not remove_ids):
+            return
+        conn = self._require_conn()
+        created_at = time.time()
+
+        with self._lock:
+            try:
+                if remove_ids:
+                    conn.executemany(
+                        "DELETE FROM user_group_memberships WHERE user_id = ? AND group_id = ?",
+                        [(user_id, int(gid)) for gid in remove_ids],
+                    )
+                if add_ids:
+                    conn.executemany(
+                        """
+                        INSERT OR IGNORE INTO user_group_memberships (user_id, group_id, created_at)
+                        VALUES (?, ?, ?)
+                        """,
+                        [(user_id, int(gid), created_at) for gid in add_ids],
+                    )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
     def get_user_groups(self, user_id: int) -> list[dict]:
         if not self.enabled:
             return []
@@ -618,6 +729,43 @@ class SQLiteAuthStorage:
             for row in rows
         ]
 
+    def get_groups_for_users(self, user_ids: list[int]) -> dict[int, list[dict]]:
+        """Batch form of get_user_groups: user_id -> groups, in one query per 500 ids."""
+        result: dict[int, list[dict]] = {int(uid): [] for uid in user_ids}
+        if not self.enabled or not result:
+            return result
+        conn = self._require_conn()
+        ids = list(result)
+
+        with self._lock:
+            rows = []
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                rows.extend(
+                    conn.execute(
+                        f"""
+                        SELECT ugm.user_id, g.id, g.name, g.description, g.allowed_hosts, g.created_at
+                        FROM user_groups g
+                        JOIN user_group_memberships ugm ON g.id = ugm.group_id
+                        WHERE ugm.user_id IN ({",".join("?" * len(chunk))})
+                        ORDER BY g.name
+                        """,
+                        chunk,
+                    ).fetchall()
+                )
+
+        for row in rows:
+            result[int(row[0])].append(
+                {
+                    "id": row[1],
+                    "name": row[2],
+                    "description": row[3],
+                    "allowed_hosts": json.loads(row[4]) if row[4] else [],
+                    "created_at": row[5],
+                }
+            )
+        return result
+
     def get_user_accessible_hosts(self, user_id: int) -> list[str]:
         """Get list of host patterns/IDs that user can access based on their groups."""
         if not self.enabled:
@@ -49,6 +49,7 @@ class Settings:
     # SQLite persistence
     metrics_db_path: str = _get_str("METRICS_DB_PATH", "data/metrics.db")
     sqlite_retention_seconds: int = _get_int("SQLITE_RETENTION_SECONDS", 24 * 60 * 60)
+    sqlite_flush_interval_seconds: float = _get_float("SQLITE_FLUSH_INTERVAL_SECONDS", 5.0)
 
     # Auth / sessions
     auth_db_path: str = _get_str("AUTH_DB_PATH", "data/auth.db")
@@ -1,33 +1,45 @@
 from __future__ import annotations
 
 import asyncio
-from collections import deque
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import hashlib
+import ipaddress
+from itertools import islice
 import json
+import logging
+import os
 import re
 import secrets
 import socket
 import subprocess
+import threading
 import time
 from html import escape
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Awaitable, Optional
 
-from fastapi import FastAPI, Form, Request, WebSocket, WebSocketDisconnect
-from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse, FileResponse
+from fastapi import APIRouter, Depends, FastAPI, Form, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse, Response
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
-from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.middleware.sessions import SessionMiddleware
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 from .anomaly import compute_insights
 from .auth_storage import auth_storage, init_auth_storage
 from .config import settings
-from .metrics import add_sample, collect_sample, history, latest
+from .metrics import add_sample, collect_sample, latest
+from .metrics import history_json as metrics_history_json
 from .models import HostCreate, InventoryItemCreate, ProtocolStatus
 from .storage import create_host as db_create_host
+from .storage import create_hosts as db_create_hosts
 from .storage import create_inventory_item as db_create_inventory_item
 from .storage import get_history as db_get_history
 from .storage import get_hosts as db_get_hosts
+from .storage import get_host_by_id as db_get_host_by_id
 from .storage import get_inventory_items as db_get_inventory_items
 from .storage import get_latest as db_get_latest
 from .storage import get_stats as db_get_stats
@@ -36,13 +48,61 @@ from .storage import update_host as db_update_host
 from .storage import delete_inventory_item as db_delete_inventory_item
 from .storage import init_storage
 from .storage import persist_sample
+from .storage import start_sample_flusher, stop_sample_flusher
 from .storage import prune_old
 from .storage import vacuum as db_vacuum
 from .storage import storage
-from .protocols import start_protocol_checker
+from .protocols import parse_ping_rtt, start_protocol_checker
 
+# Optional dependencies
+try:
+    import orjson  # type: ignore
+except Exception:  # pragma: no cover
+    orjson = None
 
-app = FastAPI(title="AI-Powered System Health Dashboard")
+try:
+    from icmplib import async_multiping as icmp_async_multiping  # type: ignore
+    from icmplib import async_ping as icmp_async_ping  # type: ignore
+except Exception:  # pragma: no cover
+    icmp_async_multiping = None
+    icmp_async_ping = None
+
+
+def _json_bytes(obj: Any) -> bytes:
+    """Compact UTF-8 JSON for WebSocket payloads (orjson when available)."""
+    if orjson is not None:
+        # Host status maps are keyed by int host id.
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+
+def _model_envelope_json(msg_type: str, sample: Any, insights: Any) -> bytes:
+    """Encode a ``{"type", "sample", "insights"}`` WebSocket message.
+
+    The models are serialized straight to JSON by pydantic-core and spliced
+    into the envelope, skipping the intermediate model_dump() dicts.
+    """
+    sample_json = sample.model_dump_json().encode("utf-8") if sample is not None else b"null"
+    return _envelope_json(msg_type, sample_json, insights.model_dump_json().encode("utf-8"))
+
+
+def _envelope_json(msg_type: str, sample_json: bytes, insights_json: bytes) -> bytes:
+    """Splice pre-encoded sample/insights JSON into a WebSocket message."""
+    return (
+        b'{"type":"' + msg_type.encode("ascii") + b'","sample":' + sample_json
+        + b',"insights":' + insights_json + b"}"
+    )
+
+
+class _ORJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+app = FastAPI(
+    title="AI-Powered System Health Dashboard",
+    default_response_class=_ORJSONResponse if orjson is not None else JSONResponse,
+)
 
 
 def _require_session_secret() -> None:
@@ -58,36 +118,53 @@ _require_session_secret()
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 
 
+# Only login endpoints are public; everything else requires auth.
+# Keep this allowlist tight: do NOT make all of /static public.
+_PUBLIC_PATHS = frozenset(
+    {
+        "/login",
+        # Public stylesheet for the login page.
+        "/static/assets/login.css",
+        # Favicon, to avoid noisy logs when unauthenticated.
+        "/favicon.ico",
+        # Hosts management page.
+        "/hosts",
+        # User management pages (they handle their own auth).
+        "/users",
+        "/user-groups",
+        # Agent metrics endpoint for auto-discovery.
+        "/api/agent/metrics",
+    }
+)
+# Public paths that never read or write the session; served without
+# decoding/verifying the session cookie at all.
+_SESSIONLESS_PATHS = frozenset(
+    {
+        "/static/assets/login.css",
+        "/favicon.ico",
+        "/api/agent/metrics",
+    }
+)
+_API_EXACT_PATHS = frozenset({"/openapi.json"})
+_API_PREFIX = "/api/"
+_STATIC_PREFIX = "/static/"
+
+# Settings are frozen; bind hot cookie names once instead of per request.
+_REMEMBER_COOKIE_NAME = settings.remember_cookie_name
+
+
 def _is_api_path(path: str) -> bool:
-    return path.startswith("/api/") or path in ("/openapi.json",)
+    return path.startswith(_API_PREFIX) or path in _API_EXACT_PATHS
 
 
 def _is_public_path(path: str) -> bool:
-    # Only login endpoints are public; everything else requires auth.
-    if path in ("/login",):
-        return True
-    # Allow a single public stylesheet for the login page.
-    # Keep this allowlist tight: do NOT make all of /static public.
-    if path == "/static/assets/login.css":
-        return True
-    # Allow favicon even when unauthenticated to avoid noisy logs.
-    if path == "/favicon.ico":
-        return True
-    # Allow hosts management page
-    if path == "/hosts":
-        return True
-    # User management pages (they handle their own auth)
-    if path in ("/users", "/user-groups"):
-        return True
-    # Allow agent metrics endpoint for auto-discovery
-    if path == "/api/agent/metrics":
-        return True
-    return False
+    return path in _PUBLIC_PATHS
 
 
-def _get_session_user_id(request: Request) -> Optional[int]:
+def _session_user_id(session: Any) -> Optional[int]:
+    """user_id from a SessionMiddleware session dict (``scope["session"]``)."""
     try:
-        v = request.session.get("user_id")  # type: ignore[attr-defined]
+        v = session.get("user_id") if session else None
     except Exception:
         return None
     if v is None:
@@ -98,50 +175,197 @@ def _get_session_user_id(request: Request) -> Optional[int]:
         return None
 
 
+def _get_session_user_id(request: Request) -> Optional[int]:
+    return _session_user_id(request.scope.get("session"))
+
+
+# Dedicated thread pools, created on first use and shut down with the app.
+# They are not import-time singletons: a later lifespan in the same process
+# (tests, --reload workers, an embedding app) gets fresh pools.
+_executors: dict[str, ThreadPoolExecutor] = {}
+
+
+def _executor(name: str, max_workers: int) -> ThreadPoolExecutor:
+    pool = _executors.get(name)
+    if pool is None:
+        pool = _executors[name] = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+    return pool
+
+
+def _shutdown_executors() -> None:
+    pools = list(_executors.values())
+    _executors.clear()
+    for pool in pools:
+        pool.shutdown(wait=False)
+
+
+# Auth DB calls get their own small pool so login/session checks are not
+# queued behind host probes and sampling in the default to_thread executor.
+_AUTH_POOL_WORKERS = 8
+
+
+def _run_auth(fn, *args: Any, **kwargs: Any) -> "asyncio.Future[Any]":
+    pool = _executor("auth", _AUTH_POOL_WORKERS)
+    return asyncio.get_running_loop().run_in_executor(pool, partial(fn, *args, **kwargs))
+
+
+# SQLite has a single writer; auth writes run on their own one-thread
+# executor so they queue there instead of parking auth pool threads on the
+# storage lock, which would starve the session lookups sharing that pool.
+def _run_auth_write(fn, *args: Any, **kwargs: Any) -> "asyncio.Future[Any]":
+    pool = _executor("auth-write", 1)
+    return asyncio.get_running_loop().run_in_executor(pool, partial(fn, *args, **kwargs))
+
+
+# Short-lived cache of user rows for the per-request auth check. Entries are
+# dropped explicitly when an admin changes or deletes a user and on logout.
+_USER_CACHE_TTL_SECONDS = 30.0
+_user_cache: dict[int, tuple[float, Any]] = {}
+
+
+_user_inflight: dict[int, "asyncio.Future[Any]"] = {}
+
+
+async def _get_user_by_id(user_id: int):
+    now = time.monotonic()
+    hit = _user_cache.get(user_id)
+    if hit is not None and now - hit[0] < _USER_CACHE_TTL_SECONDS:
+        return hit[1]
+    # Reconnect bursts (many tabs) miss together; share one DB lookup per uid.
+    pending = _user_inflight.get(user_id)
+    if pending is not None:
+        return await asyncio.shield(pending)
+    fut = _run_auth(auth_storage.get_user_by_id, user_id)
+    _user_inflight[user_id] = fut
+    try:
+        user = await asyncio.shield(fut)
+    finally:
+        _user_inflight.pop(user_id, None)
+    if user is None:
+        _user_cache.pop(user_id, None)
+    else:
+        _user_cache[user_id] = (now, user)
+    return user
+
+
+def _invalidate_user(user_id: Optional[int]) -> None:
+    if user_id is not None:
+        _user_cache.pop(int(user_id), None)
+
+
+# Remember-me token -> (cached_at, user_id) for recently validated tokens, so
+# reconnecting WebSockets and cookie-only requests skip the token table.
+_REMEMBER_CACHE_TTL_SECONDS = 30.0
+_REMEMBER_CACHE_MAX = 4096
+_remember_cache: "OrderedDict[str, tuple[float, int]]" = OrderedDict()
+
+
+async def _validate_remember_token(token: str) -> Optional[int]:
+    now = time.monotonic()
+    hit = _remember_cache.get(token)
+    if hit is not None:
+        if now - hit[0] < _REMEMBER_CACHE_TTL_SECONDS:
+            return hit[1]
+        del _remember_cache[token]
+    uid = await _run_auth(auth_storage.validate_remember_token, token)
+    if uid is not None:
+        _remember_cache[token] = (now, int(uid))
+        if len(_remember_cache) > _REMEMBER_CACHE_MAX:
+            _remember_cache.popitem(last=False)
+    return uid
+
+
 async def _get_current_user(request: Request):
+    # AuthMiddleware already resolved the user for non-public paths.
+    user = getattr(request.state, "user", None)
+    if user is not None:
+        return user
     user_id = _get_session_user_id(request)
     if user_id is None:
         return None
-    return await asyncio.to_thread(auth_storage.get_user_by_id, user_id)
+    return await _get_user_by_id(user_id)
+
+
+# Rejections are identical every time; build them once and replay them.
+_NOT_AUTHENTICATED_RESPONSE = JSONResponse({"detail": "Not authenticated"}, status_code=401)
+_LOGIN_REDIRECT_RESPONSE = RedirectResponse(url="/login", status_code=303)
+
+
+class AuthMiddleware:
+    """Session/remember-me auth gate as a plain ASGI middleware.
 
+    Unlike BaseHTTPMiddleware this adds no extra task or body stream per
+    request. It sits outside SessionMiddleware (which it wraps itself), so
+    paths in ``_SESSIONLESS_PATHS`` skip cookie decoding and HMAC checks
+    entirely; other public paths still get a session but no auth check.
+    """
+
+    def __init__(self, app: ASGIApp, **session_kwargs: Any) -> None:
+        self.app = app
+        self.session_app = SessionMiddleware(self._gate, **session_kwargs)
 
-class AuthMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        path = request.url.path
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["path"] in _SESSIONLESS_PATHS:
+            await self.app(scope, receive, send)
+            return
+        await self.session_app(scope, receive, send)
 
+    async def _gate(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
         if _is_public_path(path):
-            return await call_next(request)
+            await self.app(scope, receive, send)
+            return
 
-        user = await _get_current_user(request)
+        # Session is read straight off the scope; a Request object is only
+        # built for the remember-me cookie fallback.
+        session = scope.get("session")
+        user_id = _session_user_id(session)
+        if user_id is not None and path.startswith(_STATIC_PREFIX):
+            # Assets only need a logged-in session; the active-user check is
+            # enforced on the pages and APIs that load them.
+            await self.app(scope, receive, send)
+            return
+        user = await _get_user_by_id(user_id) if user_id is not None else None
         if user is None:
-            remember_token = request.cookies.get(settings.remember_cookie_name)
+            remember_token = Request(scope).cookies.get(_REMEMBER_COOKIE_NAME)
             if remember_token:
-                uid = await asyncio.to_thread(auth_storage.validate_remember_token, remember_token)
+                uid = await _validate_remember_token(remember_token)
                 if uid is not None:
                     try:
-                        request.session["user_id"] = int(uid)  # type: ignore[attr-defined]
+                        session["user_id"] = int(uid)  # type: ignore[index]
                     except Exception:
                         pass
-                    user = await asyncio.to_thread(auth_storage.get_user_by_id, int(uid))
+                    user = await _get_user_by_id(int(uid))
+
         if user is None or not user.is_active:
-            if _is_api_path(path):
-                return JSONResponse({"detail": "Not authenticated"}, status_code=401)
-            return RedirectResponse(url="/login", status_code=303)
+            response = _NOT_AUTHENTICATED_RESPONSE if _is_api_path(path) else _LOGIN_REDIRECT_RESPONSE
+            await response(scope, receive, send)
+            return
+
+        # Hand the authenticated user to route dependencies (request.state.user).
+        scope.setdefault("state", {})["user"] = user
+        await self.app(scope, receive, send)
+
+
+async def require_admin(request: Request) -> None:
+    """Route dependency for /api/admin/*; the role check runs only on admin routes."""
+    user = await _get_current_user(request)
+    if user is None or not user.is_active or user.role != "admin":
+        raise HTTPException(status_code=403, detail="Forbidden")
 
-        # Admin-only endpoints
-        if path.startswith("/api/admin/"):
-            if user.role != "admin":
-                return JSONResponse({"detail": "Forbidden"}, status_code=403)
 
-        return await call_next(request)
+admin_router = APIRouter(prefix="/api/admin", dependencies=[Depends(require_admin)])
 
 
-# IMPORTANT: middleware order
-# We want SessionMiddleware to run first (outermost) so request.session is available
-# when AuthMiddleware runs.
-app.add_middleware(AuthMiddleware)
+# AuthMiddleware is the outermost layer and wraps SessionMiddleware itself,
+# so request.session is still available to the auth gate and routes while
+# sessionless public paths bypass cookie parsing.
 app.add_middleware(
-    SessionMiddleware,
+    AuthMiddleware,
     secret_key=settings.session_secret_key,
     max_age=int(settings.session_max_age_seconds),
     session_cookie=settings.session_cookie_name,
@@ -150,23 +374,8 @@ app.add_middleware(
 )
 
 
-@app.get("/login", response_class=HTMLResponse)
-async def login_page(request: Request) -> Any:
-    err = request.query_params.get("err")
-    msg = "Invalid username or password." if err else ""
-    err_html = f"<div class='err' role='alert'>{escape(msg)}</div>" if msg else ""
-    aria_invalid = 'aria-invalid="true"' if msg else ""
-    version = escape(getattr(settings, "app_version", "dev") or "dev")
-
-    help_url = (getattr(settings, "help_url", "") or "").strip()
-    help_html = (
-        f'<a class="helpLink" href="{escape(help_url, quote=True)}" target="_blank" rel="noreferrer">Help / Docs</a>'
-        if help_url
-        else ""
-    )
-
-    # Avoid str.format/f-strings here: the embedded CSS uses lots of curly braces.
-    html = """<!doctype html>
+# Avoid str.format/f-strings here: the embedded CSS uses lots of curly braces.
+_LOGIN_HTML_TEMPLATE = """<!doctype html>
 <html>
     <head>
         <meta charset="utf-8" />
@@ -238,13 +447,37 @@ async def login_page(request: Request) -> Any:
 </html>
 """
 
+
+def _login_help_html() -> str:
+    help_url = (getattr(settings, "help_url", "") or "").strip()
+    if not help_url:
+        return ""
+    return f'<a class="helpLink" href="{escape(help_url, quote=True)}" target="_blank" rel="noreferrer">Help / Docs</a>'
+
+
+def _render_login_html(err_html: str, aria_invalid: str) -> str:
+    version = escape(getattr(settings, "app_version", "dev") or "dev")
     return (
-        html.replace("%%ERR_HTML%%", err_html)
+        _LOGIN_HTML_TEMPLATE.replace("%%ERR_HTML%%", err_html)
         .replace("%%ARIA_INVALID%%", aria_invalid)
         .replace("%%APP_VERSION%%", version)
-        .replace("%%HELP_HTML%%", help_html)
+        .replace("%%HELP_HTML%%", _login_help_html())
     )
 
+
+# Settings are frozen, so the common no-error page can be rendered once.
+_LOGIN_HTML_DEFAULT = _render_login_html("", "").encode("utf-8")
+_LOGIN_HTML_ERROR = _render_login_html(
+    f"<div class='err' role='alert'>{escape('Invalid username or password.')}</div>",
+    'aria-invalid="true"',
+).encode("utf-8")
+
+
+@app.get("/login", response_class=HTMLResponse)
+async def login_page(request: Request) -> Any:
+    err = request.query_params.get("err")
+    return HTMLResponse(_LOGIN_HTML_ERROR if err else _LOGIN_HTML_DEFAULT)
+
 @app.post("/login")
 async def login_submit(
     request: Request,
@@ -252,11 +485,8 @@ async def login_submit(
     password: str = Form(...),
     remember_me: Optional[str] = Form(None),
 ) -> Any:
-    user = await asyncio.to_thread(auth_storage.get_user_by_username, username)
-    if user is None or not user.is_active:
-        return RedirectResponse(url="/login?err=1", status_code=303)
-    ok = await asyncio.to_thread(auth_storage.verify_password, password, user.password_hash)
-    if not ok:
+    user = await _run_auth(auth_storage.authenticate, username, password)
+    if user is None:
         return RedirectResponse(url="/login?err=1", status_code=303)
 
     request.session["user_id"] = int(user.id)  # type: ignore[attr-defined]
@@ -272,7 +502,7 @@ async def login_submit(
                 ip = request.client.host
         except Exception:
             ip = None
-        await asyncio.to_thread(
+        await _run_auth_write(
             auth_storage.create_remember_token,
             int(user.id),
             token,
@@ -297,7 +527,9 @@ async def login_submit(
 async def logout(request: Request) -> Any:
     remember_token = request.cookies.get(settings.remember_cookie_name)
     if remember_token:
-        await asyncio.to_thread(auth_storage.revoke_remember_token, remember_token)
+        _remember_cache.pop(remember_token, None)
+        await _run_auth_write(auth_storage.revoke_remember_token, remember_token)
+    _invalidate_user(_get_session_user_id(request))
     try:
         request.session.clear()  # type: ignore[attr-defined]
     except Exception:
@@ -307,46 +539,88 @@ async def logout(request: Request) -> Any:
     return resp
 
 
+# Static HTML pages are served from memory with an ETag so browsers can
+# revalidate cheaply. Entries are keyed on the file's mtime (one stat per
+# request), so pages edited during development, e.g. under uvicorn --reload,
+# are re-read instead of served stale.
+_HTML_PAGE_CACHE: dict[str, tuple[int, bytes, str]] = {}
+
+
+def _load_html_page(path: str) -> tuple[bytes, str]:
+    mtime_ns = Path(path).stat().st_mtime_ns
+    cached = _HTML_PAGE_CACHE.get(path)
+    if cached is None or cached[0] != mtime_ns:
+        content = Path(path).read_bytes()
+        etag = '"' + hashlib.blake2b(content, digest_size=8).hexdigest() + '"'
+        cached = (mtime_ns, content, etag)
+        _HTML_PAGE_CACHE[path] = cached
+    return cached[1], cached[2]
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak If-None-Match comparison: a list of tags, ``W/`` prefixes or ``*``."""
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return True
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
+def _html_page_response(request: Request, path: str, headers: Optional[dict[str, str]] = None) -> Response:
+    content, etag = _load_html_page(path)
+    resp_headers = {"ETag": etag}
+    if headers:
+        resp_headers.update(headers)
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=resp_headers)
+    return HTMLResponse(content, headers=resp_headers)
+
+
 @app.get("/", response_class=HTMLResponse)
-async def index() -> Any:
-    with open("app/static/index.html", "r", encoding="utf-8") as f:
-        return f.read()
+async def index(request: Request) -> Any:
+    return _html_page_response(request, "app/static/index.html")
 
 
 @app.get("/overview", response_class=HTMLResponse)
-async def overview_page() -> Any:
-    with open("app/static/overview.html", "r", encoding="utf-8") as f:
-        return f.read()
+async def overview_page(request: Request) -> Any:
+    return _html_page_response(request, "app/static/overview.html")
 
 
 @app.get("/configuration", response_class=HTMLResponse)
-async def configuration_page() -> Any:
-    with open("app/static/configuration.html", "r", encoding="utf-8") as f:
-        return f.read()
+async def configuration_page(request: Request) -> Any:
+    return _html_page_response(request, "app/static/configuration.html")
 
 
 @app.get("/inventory", response_class=HTMLResponse)
-async def inventory_page() -> Any:
-    with open("app/static/inventory.html", "r", encoding="utf-8") as f:
-        return f.read()
+async def inventory_page(request: Request) -> Any:
+    return _html_page_response(request, "app/static/inventory.html")
 
 
 @app.get("/host/{host_id}", response_class=HTMLResponse)
-async def host_page(host_id: int) -> Any:
+async def host_page(host_id: int, request: Request) -> Any:
     # host_id is used by the frontend JS; keep the HTML static.
-    with open("app/static/host.html", "r", encoding="utf-8") as f:
-        return HTMLResponse(
-            f.read(),
-            headers={
-                # The page itself references versioned assets, but browsers may
-                # still cache HTML aggressively; prevent stale asset URLs.
-                "Cache-Control": "no-store",
-            },
-        )
+    return _html_page_response(
+        request,
+        "app/static/host.html",
+        headers={
+            # The page itself references versioned assets, but browsers may
+            # still cache HTML aggressively; prevent stale asset URLs.
+            "Cache-Control": "no-store",
+        },
+    )
 
 
 @app.get("/api/metrics/latest")
 async def api_latest() -> Any:
+    cached = _fresh_metrics_snapshot()
+    if cached is not None:
+        return Response(content=cached[1], media_type="application/json")
     sample = latest()
     if sample is None and storage.enabled:
         sample = await db_get_latest()
@@ -356,15 +630,20 @@ async def api_latest() -> Any:
 @app.get("/api/metrics/history")
 async def api_history(seconds: int = 300) -> Any:
     seconds = max(10, min(int(seconds), settings.history_seconds))
-    if storage.enabled:
-        samples = await db_get_history(seconds)
-    else:
-        samples = history(seconds)
+    # The in-memory history keeps each sample's JSON from the sampler tick;
+    # only go to the database when memory does not cover the window yet.
+    cached = metrics_history_json(seconds, require_full=storage.enabled)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
+    samples = await db_get_history(seconds)
     return [s.model_dump() for s in samples]
 
 
 @app.get("/api/insights")
 async def api_insights() -> Any:
+    cached = _fresh_metrics_snapshot()
+    if cached is not None:
+        return Response(content=cached[2], media_type="application/json")
     return compute_insights().model_dump()
 
 
@@ -400,93 +679,107 @@ def _set_dashboard_host_id(host_id: int | None) -> None:
         json.dump({'host_id': host_id}, f)
 
 
-@app.get("/api/admin/dashboard-host")
-async def get_dashboard_host(request: Request) -> Any:
+@admin_router.get("/dashboard-host")
+async def get_dashboard_host() -> Any:
     """Get the currently selected dashboard host (admin only)."""
-    user = await _get_current_user(request)
-    if user is None or user.role != "admin":
-        return JSONResponse({"detail": "Forbidden"}, status_code=403)
     host_id = await asyncio.to_thread(_get_dashboard_host_id)
     return {"host_id": host_id}
 
 
-@app.put("/api/admin/dashboard-host")
+@admin_router.put("/dashboard-host")
 async def set_dashboard_host(request: Request) -> Any:
     """Set the dashboard host (admin only). Pass host_id=null to use local metrics."""
-    user = await _get_current_user(request)
-    if user is None or user.role != "admin":
-        return JSONResponse({"detail": "Forbidden"}, status_code=403)
     body = await request.json()
     host_id = body.get("host_id")  # None = local
     await asyncio.to_thread(_set_dashboard_host_id, int(host_id) if host_id is not None else None)
     return {"host_id": host_id}
 
+# Settings are frozen, so the public part of /api/config is built once.
+# IMPORTANT: do not expose secrets (SESSION_SECRET_KEY) or other sensitive fields.
+_BASE_CONFIG: dict[str, Any] = {
+    "app": {
+        "title": "AI-Powered System Health Dashboard",
+        "version": getattr(settings, "app_version", "dev") or "dev",
+        "help_url": str(getattr(settings, "help_url", "") or ""),
+    },
+    "sampling": {
+        "sample_interval_seconds": float(settings.sample_interval_seconds),
+        "history_seconds": int(settings.history_seconds),
+    },
+    "anomaly": {
+        "window_seconds": int(getattr(settings, "anomaly_window_seconds", 0) or 0),
+        "z_threshold": float(getattr(settings, "anomaly_z_threshold", 0.0) or 0.0),
+    },
+    "protocols": {
+        "check_interval_seconds": float(getattr(settings, "protocol_check_interval_seconds", 0.0) or 0.0),
+        "ntp": {
+            "server": str(getattr(settings, "ntp_server", "") or ""),
+            "timeout_seconds": float(getattr(settings, "ntp_timeout_seconds", 0.0) or 0.0),
+        },
+        "icmp": {
+            "host": str(getattr(settings, "icmp_host", "") or ""),
+            "timeout_seconds": float(getattr(settings, "icmp_timeout_seconds", 0.0) or 0.0),
+        },
+        "snmp": {
+            "host": str(getattr(settings, "snmp_host", "") or ""),
+            "port": int(getattr(settings, "snmp_port", 0) or 0),
+            "timeout_seconds": float(getattr(settings, "snmp_timeout_seconds", 0.0) or 0.0),
+            "community_set": bool(str(getattr(settings, "snmp_community", "") or "").strip()),
+        },
+        "netflow": {
+            "port": int(getattr(settings, "netflow_port", 0) or 0),
+        },
+    },
+    "storage": {
+        "enabled": bool(storage.enabled),
+        "sqlite_retention_seconds": int(getattr(settings, "sqlite_retention_seconds", 0) or 0),
+    },
+    "auth": {
+        "session_cookie_name": str(settings.session_cookie_name),
+        "session_max_age_seconds": int(settings.session_max_age_seconds),
+        "session_cookie_samesite": str(settings.session_cookie_samesite),
+        "session_cookie_secure": bool(settings.session_cookie_secure),
+        "remember_cookie_name": str(settings.remember_cookie_name),
+        "remember_max_age_seconds": int(settings.remember_max_age_seconds),
+    },
+}
+
+_ADMIN_CONFIG_PATHS: dict[str, str] = {
+    "metrics_db_path": str(getattr(settings, "metrics_db_path", "") or ""),
+    "auth_db_path": str(getattr(settings, "auth_db_path", "") or ""),
+}
+
+_DB_STATS_TTL_SECONDS = 5.0
+_db_stats_cache: Optional[tuple[float, dict]] = None
+
+
+async def _cached_db_stats() -> dict:
+    global _db_stats_cache
+    now = time.monotonic()
+    if _db_stats_cache is not None and now - _db_stats_cache[0] < _DB_STATS_TTL_SECONDS:
+        return _db_stats_cache[1]
+    stats = await db_get_stats()
+    _db_stats_cache = (now, stats)
+    return stats
+
+
 @app.get("/api/config")
 async def api_config(request: Request) -> Any:
     """Return non-secret configuration values for display in the UI."""
     user = await _get_current_user(request)
     is_admin = bool(user and getattr(user, "role", "") == "admin")
-
-    # IMPORTANT: do not expose secrets (SESSION_SECRET_KEY) or other sensitive fields.
-    cfg: dict[str, Any] = {
-        "app": {
-            "title": "AI-Powered System Health Dashboard",
-            "version": getattr(settings, "app_version", "dev") or "dev",
-            "help_url": str(getattr(settings, "help_url", "") or ""),
-        },
-        "sampling": {
-            "sample_interval_seconds": float(settings.sample_interval_seconds),
-            "history_seconds": int(settings.history_seconds),
-        },
-        "anomaly": {
-            "window_seconds": int(getattr(settings, "anomaly_window_seconds", 0) or 0),
-            "z_threshold": float(getattr(settings, "anomaly_z_threshold", 0.0) or 0.0),
-        },
-        "protocols": {
-            "check_interval_seconds": float(getattr(settings, "protocol_check_interval_seconds", 0.0) or 0.0),
-            "ntp": {
-                "server": str(getattr(settings, "ntp_server", "") or ""),
-                "timeout_seconds": float(getattr(settings, "ntp_timeout_seconds", 0.0) or 0.0),
-            },
-            "icmp": {
-                "host": str(getattr(settings, "icmp_host", "") or ""),
-                "timeout_seconds": float(getattr(settings, "icmp_timeout_seconds", 0.0) or 0.0),
-            },
-            "snmp": {
-                "host": str(getattr(settings, "snmp_host", "") or ""),
-                "port": int(getattr(settings, "snmp_port", 0) or 0),
-                "timeout_seconds": float(getattr(settings, "snmp_timeout_seconds", 0.0) or 0.0),
-                "community_set": bool(str(getattr(settings, "snmp_community", "") or "").strip()),
-            },
-            "netflow": {
-                "port": int(getattr(settings, "netflow_port", 0) or 0),
-            },
-        },
-        "storage": {
-            "enabled": bool(storage.enabled),
-            "sqlite_retention_seconds": int(getattr(settings, "sqlite_retention_seconds", 0) or 0),
-        },
-        "auth": {
-            "session_cookie_name": str(settings.session_cookie_name),
-            "session_max_age_seconds": int(settings.session_max_age_seconds),
-            "session_cookie_samesite": str(settings.session_cookie_samesite),
-            "session_cookie_secure": bool(settings.session_cookie_secure),
-            "remember_cookie_name": str(settings.remember_cookie_name),
-            "remember_max_age_seconds": int(settings.remember_max_age_seconds),
-        },
-    }
+    if not is_admin:
+        return _BASE_CONFIG
 
     # Admins can see file paths (useful for operations); viewers should not.
-    if is_admin:
-        cfg["paths"] = {
-            "metrics_db_path": str(getattr(settings, "metrics_db_path", "") or ""),
-            "auth_db_path": str(getattr(settings, "auth_db_path", "") or ""),
-        }
+    cfg = dict(_BASE_CONFIG)
+    cfg["paths"] = _ADMIN_CONFIG_PATHS
 
     # Admins can see DB stats (path/size/rows). Viewers should not.
-    if is_admin and storage.enabled:
+    if storage.enabled:
+        cfg["storage"] = dict(cfg["storage"])
         try:
-            cfg["storage"]["db_stats"] = await db_get_stats()
+            cfg["storage"]["db_stats"] = await _cached_db_stats()
         except Exception:
             cfg["storage"]["db_stats"] = {"detail": "unavailable"}
 
@@ -514,29 +807,22 @@ async def api_inventory() -> Any:
 @app.get("/api/hosts/status")
 async def api_hosts_status() -> Any:
     # Auth is handled by middleware.
-    async with _host_status_lock:
-        return {
-            "ts": float(_host_status_ts),
-            "statuses": dict(_host_status),
-            "checks_ts": float(_host_checks_ts),
-            "checks": dict(_host_checks),
-        }
+    ts, statuses, checks = _host_snapshot
+    return {"ts": ts, "statuses": statuses, "checks_ts": ts, "checks": checks}
 
 
 @app.get("/api/hosts/{host_id}/status")
 async def api_host_status(host_id: int) -> Any:
     # Auth is handled by middleware.
-    async with _host_status_lock:
-        st = _host_status.get(int(host_id))
-        return {"ts": float(_host_status_ts), "host_id": int(host_id), "status": st}
+    ts, statuses, _checks = _host_snapshot
+    return {"ts": ts, "host_id": int(host_id), "status": statuses.get(int(host_id))}
 
 
 @app.get("/api/hosts/{host_id}/checks")
 async def api_host_checks(host_id: int) -> Any:
     # Auth is handled by middleware.
-    async with _host_status_lock:
-        checks = _host_checks.get(int(host_id))
-        return {"ts": float(_host_checks_ts), "host_id": int(host_id), "checks": checks or {}}
+    ts, _statuses, checks = _host_snapshot
+    return {"ts": ts, "host_id": int(host_id), "checks": checks.get(int(host_id)) or {}}
 
 
 @app.get("/api/hosts/{host_id}")
@@ -544,15 +830,10 @@ async def api_host(host_id: int) -> Any:
     # Auth is handled by middleware.
     if not storage.enabled:
         return JSONResponse({"detail": "Host storage is disabled"}, status_code=503)
-    # Storage layer currently provides list_hosts; keep this simple.
-    hosts = await db_get_hosts(active_only=False)
-    for h in hosts:
-        try:
-            if int(getattr(h, "id", -1)) == int(host_id):
-                return h.model_dump()
-        except Exception:
-            continue
-    return JSONResponse({"detail": "Not found"}, status_code=404)
+    host = await db_get_host_by_id(int(host_id))
+    if host is None:
+        return JSONResponse({"detail": "Not found"}, status_code=404)
+    return host.model_dump()
 
 
 @app.get("/api/events/recent")
@@ -569,24 +850,23 @@ async def api_events_recent(host_id: Optional[int] = None, limit: int = 500) ->
     limit_i = max(1, min(500, limit_i))
 
     async with _host_events_lock:
-        evs = list(_host_events)
-
-    if host_id is not None:
-        try:
-            hid = int(host_id)
-            evs = [e for e in evs if int(e.get("host_id") or 0) == hid]
-        except Exception:
+        if host_id is None:
+            ring = _host_events
+        else:
+            ring = _host_events_by_host.get(int(host_id))
+        if not ring:
             evs = []
-
-    if len(evs) > limit_i:
-        evs = evs[-limit_i:]
+        elif len(ring) > limit_i:
+            evs = list(islice(ring, len(ring) - limit_i, None))
+        else:
+            evs = list(ring)
 
     return {"events": evs}
 
 
-@app.post("/api/admin/hosts")
+@admin_router.post("/hosts")
 async def api_admin_hosts_create(payload: HostCreate) -> Any:
-    # Admin role is enforced by middleware for /api/admin/*.
+    # Admin role is enforced by the admin_router dependency.
     if not storage.enabled:
         return JSONResponse({"detail": "Host storage is disabled"}, status_code=503)
     try:
@@ -596,9 +876,9 @@ async def api_admin_hosts_create(payload: HostCreate) -> Any:
     return host.model_dump()
 
 
-@app.post("/api/admin/inventory")
+@admin_router.post("/inventory")
 async def api_admin_inventory_create(payload: InventoryItemCreate) -> Any:
-    # Admin role is enforced by middleware for /api/admin/*.
+    # Admin role is enforced by the admin_router dependency.
     if not storage.enabled:
         return JSONResponse({"detail": "Inventory storage is disabled"}, status_code=503)
     try:
@@ -608,7 +888,7 @@ async def api_admin_inventory_create(payload: InventoryItemCreate) -> Any:
     return item.model_dump()
 
 
-@app.put("/api/admin/hosts/{host_id}")
+@admin_router.put("/hosts/{host_id}")
 async def api_admin_hosts_update(host_id: int, payload: HostCreate) -> Any:
     if not storage.enabled:
         return JSONResponse({"detail": "Host storage is disabled"}, status_code=503)
@@ -618,11 +898,9 @@ async def api_admin_hosts_update(host_id: int, payload: HostCreate) -> Any:
     return host.model_dump()
 
 
-@app.post("/api/admin/hosts/{host_id}/install-agent")
+@admin_router.post("/hosts/{host_id}/install-agent")
 async def api_admin_hosts_install_agent(host_id: int, payload: dict) -> Any:
-    import asyncio, tempfile, os
-    hosts = await db_get_hosts(active_only=False)
-    host = next((h for h in hosts if h.id == int(host_id)), None)
+    host = await db_get_host_by_id(int(host_id))
     if not host:
         return JSONResponse({"detail": "Host not found"}, status_code=404)
 
@@ -750,18 +1028,17 @@ echo "REAL_HOSTNAME=$(hostname -f 2>/dev/null || hostname)"
         # Update host name in DB with real hostname
         if real_hostname and real_hostname not in ("", "localhost", "localhost.localdomain"):
             try:
-                from app.models import HostCreate as HC
-                existing_host = next((h for h in hosts if h.id == int(host_id)), None)
-                if existing_host:
-                    await db_update_host(int(host_id), HC(
-                        name=real_hostname,
-                        address=existing_host.address,
-                        type=existing_host.type or "linux",
-                        tags=existing_host.tags or [],
-                        notes=existing_host.notes,
-                    ))
+                await db_update_host(int(host_id), HostCreate(
+                    name=real_hostname,
+                    address=host.address,
+                    type=host.type or "linux",
+                    tags=host.tags or [],
+                    notes=host.notes,
+                ))
             except Exception:
-                pass
+                logging.getLogger("uvicorn").exception(
+                    "Failed to rename host %s to %s after agent install", host_id, real_hostname
+                )
 
         msg = f"Agent installed on {real_hostname or target_ip} successfully"
         return {"ok": True, "message": msg, "hostname": real_hostname or target_ip}
@@ -773,17 +1050,20 @@ echo "REAL_HOSTNAME=$(hostname -f 2>/dev/null || hostname)"
         return JSONResponse({"detail": str(e)}, status_code=500)
 
 
-@app.delete("/api/admin/hosts/{host_id}")
+@admin_router.delete("/hosts/{host_id}")
 async def api_admin_hosts_delete(host_id: int) -> Any:
     if not storage.enabled:
         return JSONResponse({"detail": "Host storage is disabled"}, status_code=503)
     ok = await db_deactivate_host(int(host_id))
     if not ok:
         return JSONResponse({"detail": "Not found"}, status_code=404)
+    # Removed hosts are no longer checked; drop their per-host event ring.
+    async with _host_events_lock:
+        _host_events_by_host.pop(int(host_id), None)
     return {"ok": True}
 
 
-@app.delete("/api/admin/inventory/{item_id}")
+@admin_router.delete("/inventory/{item_id}")
 async def api_admin_inventory_delete(item_id: int) -> Any:
     if not storage.enabled:
         return JSONResponse({"detail": "Inventory storage is disabled"}, status_code=503)
@@ -793,78 +1073,178 @@ async def api_admin_inventory_delete(item_id: int) -> Any:
     return {"ok": True}
 
 
-@app.get("/api/admin/db")
+@admin_router.get("/db")
 async def api_admin_db() -> Any:
-    return await db_get_stats()
+    global _db_stats_cache
+    stats = await db_get_stats()
+    _db_stats_cache = (time.monotonic(), stats)
+    return stats
 
 
-@app.post("/api/admin/db/prune")
+@admin_router.post("/db/prune")
 async def api_admin_db_prune() -> Any:
     deleted = await prune_old()
     return {"deleted": int(deleted)}
 
 
-@app.post("/api/admin/db/vacuum")
+@admin_router.post("/db/vacuum")
 async def api_admin_db_vacuum() -> Any:
-    # Best-effort file size before/after
-    before = await db_get_stats()
+    global _db_stats_cache
+    # Best-effort file size before/after; "before" may come from the short
+    # stats cache filled by /api/config and /api/admin/db.
+    before = await _cached_db_stats()
     await db_vacuum()
     after = await db_get_stats()
+    _db_stats_cache = (time.monotonic(), after)
     return {"before": before, "after": after}
 
 
+# Per-client outbound queue bound; when a client falls behind, the oldest
+# pending message is dropped so memory stays flat and the producers never wait.
+_WS_QUEUE_MAXSIZE = 64
+
+
+def _put_drop_oldest(q: asyncio.Queue[bytes], data: bytes) -> None:
+    try:
+        q.put_nowait(data)
+    except asyncio.QueueFull:
+        try:
+            q.get_nowait()
+        except asyncio.QueueEmpty:
+            pass
+        q.put_nowait(data)
+
+
 class Broadcaster:
+    """Fan out JSON messages to WebSocket clients.
+
+    Each client gets a bounded queue drained by its own sender task. The
+    sender blocks on the first pending message, then drains whatever else is
+    queued and ships it as a single ``{"batch": [...]}`` frame, so bursts
+    (e.g. host events + host_status) cost one frame per client. Messages are
+    encoded to UTF-8 once and sent as binary frames, so no per-client
+    re-encoding happens.
+    """
+
     def __init__(self) -> None:
-        self._clients: set[WebSocket] = set()
-        self._lock = asyncio.Lock()
+        self._clients: dict[WebSocket, tuple[asyncio.Queue[bytes], asyncio.Task]] = {}
+        # Copy-on-write snapshot of the client queues. Rebuilt on add/remove
+        # (rare) so the broadcast paths read it with a single attribute load.
+        self._queues: tuple[asyncio.Queue[bytes], ...] = ()
+
+    def _publish(self) -> None:
+        self._queues = tuple(q for q, _task in self._clients.values())
 
     async def add(self, ws: WebSocket) -> None:
-        async with self._lock:
-            self._clients.add(ws)
+        q: asyncio.Queue[bytes] = asyncio.Queue(maxsize=_WS_QUEUE_MAXSIZE)
+        task = asyncio.create_task(self._sender(ws, q))
+        self._clients[ws] = (q, task)
+        self._publish()
 
     async def remove(self, ws: WebSocket) -> None:
-        async with self._lock:
-            self._clients.discard(ws)
+        entry = self._clients.pop(ws, None)
+        if entry is not None:
+            self._publish()
+            entry[1].cancel()
+
+    async def close(self) -> None:
+        """Stop every sender task concurrently (used on shutdown)."""
+        tasks = [task for _q, task in self._clients.values()]
+        self._clients.clear()
+        self._publish()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    @property
+    def has_clients(self) -> bool:
+        return bool(self._queues)
 
     async def broadcast(self, msg: dict[str, Any]) -> None:
-        data = json.dumps(msg)
-        async with self._lock:
-            clients = list(self._clients)
-        if not clients:
+        if not self._queues:
             return
-        dead: list[WebSocket] = []
-        for ws in clients:
-            try:
-                await ws.send_text(data)
-            except Exception:
-                dead.append(ws)
-        if dead:
-            async with self._lock:
-                for ws in dead:
-                    self._clients.discard(ws)
+        data = _json_bytes(msg)
+        for q in self._queues:
+            _put_drop_oldest(q, data)
+
+    async def broadcast_raw(self, data: bytes) -> None:
+        """Queue an already-encoded JSON message as-is."""
+        for q in self._queues:
+            _put_drop_oldest(q, data)
+
+    async def broadcast_many(self, msgs: list[dict[str, Any]]) -> None:
+        """Queue several messages at once; senders ship them as one batch frame."""
+        if not msgs or not self._queues:
+            return
+        encoded = [_json_bytes(m) for m in msgs]
+        for q in self._queues:
+            for data in encoded:
+                _put_drop_oldest(q, data)
+
+    async def _sender(self, ws: WebSocket, q: asyncio.Queue[bytes]) -> None:
+        try:
+            while True:
+                batch = [await q.get()]
+                while True:
+                    try:
+                        batch.append(q.get_nowait())
+                    except asyncio.QueueEmpty:
+                        break
+                if len(batch) == 1:
+                    frame = batch[0]
+                else:
+                    # Messages are already JSON; splice them instead of re-encoding.
+                    frame = b'{"batch":[' + b",".join(batch) + b"]}"
+                await ws.send_bytes(frame)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Dead socket: stop queueing for it.
+            if self._clients.pop(ws, None) is not None:
+                self._publish()
 
 
 broadcaster = Broadcaster()
 
 
 # --- Host status (best-effort ICMP reachability) ---
-_host_status_lock = asyncio.Lock()
-_host_status_ts: float = 0.0
-_host_status: dict[int, dict[str, Any]] = {}
-
-_host_checks_ts: float = 0.0
-_host_checks: dict[int, dict[str, Any]] = {}
+# Published by _host_checker_loop as a single (ts, statuses, checks) tuple.
+# The dicts are never mutated once published, so readers grab the reference
+# without locking or copying and always see a consistent pair.
+_host_snapshot: tuple[float, dict[int, dict[str, Any]], dict[int, dict[str, Any]]] = (0.0, {}, {})
+# Normalized (icmp, ssh, dns, snmp, ntp) statuses per host from the last cycle.
+_host_status_rows: dict[int, tuple[str, ...]] = {}
 
 # --- Recent host events (in-memory, non-persistent) ---
 # Used by the dashboard's "Problems" view.
 _host_events_lock = asyncio.Lock()
 _host_events: deque[dict[str, Any]] = deque(maxlen=500)
+# Per-host rings so a single host's history is read without scanning all events.
+_host_events_by_host: defaultdict[int, deque[dict[str, Any]]] = defaultdict(lambda: deque(maxlen=500))
 
 _HOST_CHECK_INTERVAL_S = 15.0
 _HOST_CHECK_MAX_CONCURRENCY = 12
-
-_PING_RE = re.compile(r"time[=<]?\s*([0-9.]+)\s*ms", re.IGNORECASE)
-
+_HOST_CHECK_MAX_BACKOFF_S = 300.0
+# Per-probe time budgets so one misbehaving host cannot hold a semaphore slot
+# (and the whole cycle) hostage. Each is the probe's own configured timeout
+# (as the probe applies it) plus slack; SSH/SNMP/NTP run back to back in one
+# thread, so their group budget is the sum of theirs.
+_SSH_CONNECT_TIMEOUT_S = 1.0
+_PROBE_SLACK_S = 0.5
+_PROBE_TIMEOUT_S = {
+    # ping -W takes whole seconds; the subprocess fallback allows another 0.5s.
+    "icmp": max(1, int(float(getattr(settings, "icmp_timeout_seconds", 1.0) or 1.0))) + 0.5 + _PROBE_SLACK_S,
+    "ssh": _SSH_CONNECT_TIMEOUT_S + _PROBE_SLACK_S,
+    "dns": 2.0,
+    # subprocess.run() kills snmpget after timeout + 2s.
+    "snmp": float(getattr(settings, "snmp_timeout_seconds", 2.0) or 2.0) + 2.0 + _PROBE_SLACK_S,
+    "ntp": max(0.2, float(getattr(settings, "ntp_timeout_seconds", 1.2) or 1.2)) + _PROBE_SLACK_S,
+}
+_BLOCKING_PROBES_TIMEOUT_S = _PROBE_TIMEOUT_S["ssh"] + _PROBE_TIMEOUT_S["snmp"] + _PROBE_TIMEOUT_S["ntp"]
+# Probe threads are kept apart from the default executor so a burst of slow
+# hosts cannot starve other to_thread users (and vice versa). One worker per
+# concurrently checked host: each host uses a single blocking hop.
+_PROBE_POOL_WORKERS = _HOST_CHECK_MAX_CONCURRENCY
 
 def _check_tcp_port(address: str, port: int, timeout_s: float) -> ProtocolStatus:
     ts = time.time()
@@ -882,20 +1262,32 @@ def _check_tcp_port(address: str, port: int, timeout_s: float) -> ProtocolStatus
         return ProtocolStatus(status="crit", checked_ts=ts, message=f"tcp/{int(port)}: {msg}")
 
 
+_IPV4_CHARS = frozenset("0123456789.")
+_IP_CHARS = frozenset("0123456789abcdefABCDEF:.")
+
+
 def _looks_like_ip(s: str) -> bool:
+    # Hostnames almost always contain a character outside the IP alphabet;
+    # reject them without calling inet_pton at all.
+    if not s or not _IP_CHARS.issuperset(s):
+        return False
+    family = socket.AF_INET6 if ":" in s else socket.AF_INET
+    if family == socket.AF_INET and not _IPV4_CHARS.issuperset(s):
+        return False
     try:
-        socket.inet_pton(socket.AF_INET, s)
-        return True
-    except Exception:
-        pass
-    try:
-        socket.inet_pton(socket.AF_INET6, s)
+        socket.inet_pton(family, s)
         return True
     except Exception:
         return False
 
 
-def _check_dns(name_or_addr: str, fallback_name: Optional[str] = None) -> ProtocolStatus:
+# Resolved names are reused for a short while; host addresses rarely change.
+_DNS_CACHE_TTL_SECONDS = 60.0
+_DNS_CACHE_MAXSIZE = 512
+_dns_cache: dict[str, tuple[float, Optional[str]]] = {}
+
+
+async def _check_dns(name_or_addr: str, fallback_name: Optional[str] = None) -> ProtocolStatus:
     ts = time.time()
     s = (name_or_addr or "").strip()
     fb = (fallback_name or "").strip()
@@ -906,8 +1298,18 @@ def _check_dns(name_or_addr: str, fallback_name: Optional[str] = None) -> Protoc
         return ProtocolStatus(status="ok", checked_ts=ts, message="ip literal")
 
     target = s or fb
-    try:
-        infos = socket.getaddrinfo(target, None)
+    now = time.monotonic()
+    hit = _dns_cache.get(target)
+    if hit is not None and hit[0] > now:
+        ip = hit[1]
+    else:
+        try:
+            infos = await asyncio.get_running_loop().getaddrinfo(target, None)
+        except Exception as e:
+            _dns_cache.pop(target, None)
+            msg = str(e)
+            msg = msg[:140] if msg else "resolution failed"
+            return ProtocolStatus(status="crit", checked_ts=ts, message=f"dns: {msg}")
         ip = None
         for inf in infos:
             try:
@@ -915,11 +1317,11 @@ def _check_dns(name_or_addr: str, fallback_name: Optional[str] = None) -> Protoc
                 break
             except Exception:
                 continue
-        return ProtocolStatus(status="ok", checked_ts=ts, message=f"{target} -> {ip or 'resolved'}")
-    except Exception as e:
-        msg = str(e)
-        msg = msg[:140] if msg else "resolution failed"
-        return ProtocolStatus(status="crit", checked_ts=ts, message=f"dns: {msg}")
+        if target not in _dns_cache and len(_dns_cache) >= _DNS_CACHE_MAXSIZE:
+            # Evict the oldest insertion.
+            _dns_cache.pop(next(iter(_dns_cache)), None)
+        _dns_cache[target] = (now + _DNS_CACHE_TTL_SECONDS, ip)
+    return ProtocolStatus(status="ok", checked_ts=ts, message=f"{target} -> {ip or 'resolved'}")
 
 
 def _check_snmp_host(address: str) -> ProtocolStatus:
@@ -933,8 +1335,6 @@ def _check_snmp_host(address: str) -> ProtocolStatus:
     if not community:
         return ProtocolStatus(status="unknown", checked_ts=ts, message="SNMP_COMMUNITY not set")
     # Use snmpwalk for SNMP checks
-    import subprocess  # type: ignore
-
     timeout = float(getattr(settings, "snmp_timeout_seconds", 2.0) or 2.0)
     try:
         t0 = time.perf_counter()
@@ -964,6 +1364,10 @@ def _check_snmp_host(address: str) -> ProtocolStatus:
         return ProtocolStatus(status="unknown", checked_ts=ts, message=f"SNMP: {e}")
 
 
+# Minimal NTP request: 48 bytes, first byte sets LI/VN/Mode.
+_NTP_CLIENT_PKT: bytes = b"\x1b" + b"\x00" * 47  # LI=0, VN=3, Mode=3 (client)
+
+
 def _check_ntp_server(address: str) -> ProtocolStatus:
     """Best-effort NTP server probe (UDP/123).
 
@@ -981,15 +1385,11 @@ def _check_ntp_server(address: str) -> ProtocolStatus:
     except Exception:
         timeout_s = 1.0
 
-    # Minimal NTP request: 48 bytes, first byte sets LI/VN/Mode.
-    pkt = bytearray(48)
-    pkt[0] = 0x1B  # LI=0, VN=3, Mode=3 (client)
-
     s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
     s.settimeout(max(0.2, timeout_s))
     try:
         t0 = time.perf_counter()
-        s.sendto(bytes(pkt), (host, 123))
+        s.sendto(_NTP_CLIENT_PKT, (host, 123))
         _data, _addr = s.recvfrom(512)
         t1 = time.perf_counter()
         return ProtocolStatus(status="ok", checked_ts=ts, latency_ms=(t1 - t0) * 1000.0, message=f"udp/123 {host}")
@@ -1004,80 +1404,275 @@ def _check_ntp_server(address: str) -> ProtocolStatus:
             pass
 
 
-def _check_host_icmp(address: str) -> ProtocolStatus:
+async def _check_host_icmp(address: str) -> ProtocolStatus:
+    """ICMP echo probe that runs on the event loop (no worker thread).
+
+    Uses icmplib's unprivileged datagram sockets when available; falls back to
+    an async ``ping`` subprocess (e.g. when ``net.ipv4.ping_group_range`` does
+    not allow unprivileged ICMP sockets).
+    """
     ts = time.time()
     host = (address or "").strip()
     if not host:
         return ProtocolStatus(status="unknown", checked_ts=ts, message="no address")
 
     timeout_s = max(1, int(float(getattr(settings, "icmp_timeout_seconds", 1.0) or 1.0)))
+
+    if icmp_async_ping is not None:
+        try:
+            r = await icmp_async_ping(host, count=1, timeout=timeout_s, privileged=False)
+        except Exception:
+            r = None
+        if r is not None:
+            if not r.is_alive:
+                return ProtocolStatus(status="crit", checked_ts=ts, message=f"{host}: no reply")
+            return ProtocolStatus(status="ok", checked_ts=ts, latency_ms=float(r.avg_rtt), message=host)
+
     try:
-        proc = subprocess.run(
-            ["ping", "-c", "1", "-W", str(timeout_s), "-n", host],
-            capture_output=True,
-            text=True,
-            timeout=float(timeout_s) + 0.5,
-            check=False,
+        proc = await asyncio.create_subprocess_exec(
+            "ping", "-c", "1", "-W", str(timeout_s), "-n", host,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
         )
+        try:
+            out_b, err_b = await asyncio.wait_for(proc.communicate(), timeout=float(timeout_s) + 0.5)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            return ProtocolStatus(status="crit", checked_ts=ts, message=f"ping failed: timed out after {timeout_s}s")
     except Exception as e:
         return ProtocolStatus(status="crit", checked_ts=ts, message=f"ping failed: {e}")
 
     if proc.returncode != 0:
-        msg = (proc.stderr or proc.stdout or "").strip()
+        msg = (err_b or out_b or b"").decode("utf-8", errors="replace").strip()
         msg = msg[:140] if msg else "no reply"
         return ProtocolStatus(status="crit", checked_ts=ts, message=f"{host}: {msg}")
 
-    out = (proc.stdout or "") + "\n" + (proc.stderr or "")
-    m = _PING_RE.search(out)
-    latency_ms = float(m.group(1)) if m else None
+    latency_ms = parse_ping_rtt(out_b)
     if latency_ms is None:
         return ProtocolStatus(status="ok", checked_ts=ts, message=host)
     return ProtocolStatus(status="ok", checked_ts=ts, latency_ms=float(latency_ms), message=host)
 
 
+def _check_blocking_protocols(
+    address: str, done: Optional[list[ProtocolStatus]] = None
+) -> tuple[ProtocolStatus, ProtocolStatus, ProtocolStatus]:
+    """Run the blocking socket probes (SSH, SNMP, NTP) in one worker thread.
+
+    Each result is also appended to ``done`` as soon as it is known, so a
+    caller that gives up on the thread can still use the finished probes.
+    """
+    out = done if done is not None else []
+    out.append(_check_tcp_port(address, 22, _SSH_CONNECT_TIMEOUT_S))
+    out.append(_check_snmp_host(address))
+    out.append(_check_ntp_server(address))
+    return (out[0], out[1], out[2])
+
+
+# Non-ICMP protocols whose transitions into crit are logged, with UI labels.
+_PROTO_LABELS = (("ssh", "SSH"), ("dns", "DNS"), ("snmp", "SNMP"), ("ntp", "NTP"))
+_KNOWN_STATUSES = {s: s for s in ("ok", "warn", "crit", "unknown")}
+_EMPTY_DICT: dict[str, Any] = {}
+
+
+def _norm_status(v: Any) -> str:
+    try:
+        # Probe statuses are almost always already canonical.
+        known = _KNOWN_STATUSES.get(v)
+        if known is not None:
+            return known
+        return str(v or "unknown").lower().strip()
+    except Exception:
+        return "unknown"
+
+
+_UNKNOWN_ROW = ("unknown",) * (1 + len(_PROTO_LABELS))
+
+
+def _status_row(icmp: dict[str, Any], host_checks: dict[str, Any]) -> tuple[str, ...]:
+    """Normalized (icmp, *_PROTO_LABELS) statuses for one host."""
+    return (
+        _norm_status(icmp.get("status")),
+        *(_norm_status((host_checks.get(k) or _EMPTY_DICT).get("status")) for k, _label in _PROTO_LABELS),
+    )
+
+
+def _detail_line(proto_dump: Any) -> str:
+    """Best-effort human detail for a ProtocolStatus model_dump()."""
+    try:
+        if not isinstance(proto_dump, dict):
+            return ""
+        msg = str(proto_dump.get("message") or "").strip()
+        lat = proto_dump.get("latency_ms")
+        parts: list[str] = []
+        if msg:
+            # Avoid gigantic lines.
+            parts.append(msg[:180])
+        if lat is not None:
+            try:
+                parts.append(f"{int(round(float(lat)))} ms")
+            except Exception:
+                pass
+        return " · ".join(parts)
+    except Exception:
+        return ""
+
+
+def _probe_timeout_status(timeout_s: float, status: str = "crit") -> ProtocolStatus:
+    return ProtocolStatus(status=status, checked_ts=time.time(), message=f"timeout after {timeout_s:g}s")
+
+
+async def _probe_with_timeout(probe: Awaitable[ProtocolStatus], timeout_s: float) -> ProtocolStatus:
+    try:
+        return await asyncio.wait_for(probe, timeout_s)
+    except asyncio.TimeoutError:
+        return _probe_timeout_status(timeout_s)
+
+
+async def _blocking_probes_with_timeout(address: str) -> tuple[ProtocolStatus, ProtocolStatus, ProtocolStatus]:
+    done: list[ProtocolStatus] = []
+    pool = _executor("probe", _PROBE_POOL_WORKERS)
+    fut = asyncio.get_running_loop().run_in_executor(pool, _check_blocking_protocols, address, done)
+    try:
+        return await asyncio.wait_for(fut, _BLOCKING_PROBES_TIMEOUT_S)
+    except asyncio.TimeoutError:
+        # Keep whatever finished; the probe still running is reported the way
+        # the probes report their own timeouts: SSH crit, SNMP/NTP unknown.
+        ssh, snmp, ntp = (list(done) + [None, None, None])[:3]
+        return (
+            ssh or _probe_timeout_status(_PROBE_TIMEOUT_S["ssh"]),
+            snmp or _probe_timeout_status(_PROBE_TIMEOUT_S["snmp"], "unknown"),
+            ntp or _probe_timeout_status(_PROBE_TIMEOUT_S["ntp"], "unknown"),
+        )
+
+
+_HOST_CHECK_KEYS = ("icmp", "ssh", "dns", "snmp", "ntp")
+
+
+async def _gather_host_checks(
+    checks: dict[int, Awaitable[tuple[int, dict[str, Any]]]], timeout_s: float
+) -> list[tuple[int, dict[str, Any]]]:
+    """Await per-host checks for at most ``timeout_s``.
+
+    Hosts that finish keep their results. Hosts still being probed at the
+    deadline are cancelled and reported unknown: a slow check is not a down host.
+    """
+    tasks = {asyncio.ensure_future(c): hid for hid, c in checks.items()}
+    if not tasks:
+        return []
+    _finished, unfinished = await asyncio.wait(tasks, timeout=timeout_s)
+    for t in unfinished:
+        t.cancel()
+    if unfinished:
+        await asyncio.gather(*unfinished, return_exceptions=True)
+        logging.getLogger("uvicorn").warning(
+            "Host checks for %d of %d hosts did not finish within %.1fs",
+            len(unfinished), len(tasks), timeout_s,
+        )
+    pairs: list[tuple[int, dict[str, Any]]] = []
+    for t, hid in tasks.items():
+        if t in unfinished:
+            timed_out = _probe_timeout_status(timeout_s, "unknown").model_dump()
+            pairs.append((hid, {"icmp": timed_out, "checks": {k: timed_out for k in _HOST_CHECK_KEYS}}))
+        elif not t.cancelled() and t.exception() is None:
+            pairs.append(t.result())
+    return pairs
+
+
+@dataclass
+class _CycleEvents:
+    """Log lines and structured host events produced by one check cycle."""
+
+    ts: float
+    host_name_by_id: dict[int, str]
+    host_addr_by_id: dict[int, str]
+    events: list[dict[str, Any]] = field(default_factory=list)
+    host_events: list[dict[str, Any]] = field(default_factory=list)
+
+    def add(self, level: str, message: str) -> None:
+        self.events.append({"type": "log", "ts": float(self.ts), "level": str(level), "message": str(message)})
+
+    def add_host(self, host_id: int, level: str, check: str, status: str, message: str) -> None:
+        try:
+            hid = int(host_id)
+        except Exception:
+            return
+        self.host_events.append(
+            {
+                "type": "host_event",
+                "ts": float(self.ts),
+                "level": str(level),
+                "host_id": hid,
+                "host_name": self.host_name_by_id.get(hid, f"host-{hid}"),
+                "address": self.host_addr_by_id.get(hid, ""),
+                "check": str(check),
+                "status": str(status),
+                "message": str(message),
+            }
+        )
+
+
+async def _check_host(sem: asyncio.Semaphore, hid: int, name: str, addr: str) -> tuple[int, dict[str, Any]]:
+    """Run every probe for one host; returns (host_id, {"icmp": ..., "checks": ...})."""
+    async with sem:
+        try:
+            # ICMP and DNS are async; the socket probes share one thread hop.
+            icmp, dns, (ssh, snmp, ntp) = await asyncio.gather(
+                _probe_with_timeout(_check_host_icmp(addr), _PROBE_TIMEOUT_S["icmp"]),
+                _probe_with_timeout(_check_dns(addr, name), _PROBE_TIMEOUT_S["dns"]),
+                _blocking_probes_with_timeout(addr),
+            )
+            checks = {
+                "icmp": icmp.model_dump(),
+                "ssh": ssh.model_dump(),
+                "dns": dns.model_dump(),
+                "snmp": snmp.model_dump(),
+                "ntp": ntp.model_dump(),
+            }
+        except Exception as e:
+            icmp = ProtocolStatus(status="crit", checked_ts=time.time(), message=f"check error: {e}")
+            checks = {"icmp": icmp.model_dump()}
+        # keep legacy per-host status = ICMP (reuse the dump from checks)
+        return (hid, {"icmp": checks["icmp"], "checks": checks})
+
+
 async def _host_checker_loop() -> None:
+    global _host_snapshot, _host_status_rows
     await asyncio.sleep(1.0)
 
+    fail_streak = 0
     while True:
+        cycle_start = time.monotonic()
         try:
             if not storage.enabled:
-                async with _host_status_lock:
-                    global _host_status_ts, _host_status
-                    _host_status_ts = time.time()
-                    _host_status = {}
-                    global _host_checks_ts, _host_checks
-                    _host_checks_ts = _host_status_ts
-                    _host_checks = {}
+                _host_snapshot = (time.time(), {}, {})
+                _host_status_rows = {}
                 await asyncio.sleep(_HOST_CHECK_INTERVAL_S)
                 continue
 
             hosts = await db_get_hosts(active_only=True)
+            # Flatten hosts once into (id, name, address); reused by probes and events.
+            host_rows: list[tuple[int, str, str]] = []
+            for h in hosts:
+                try:
+                    hid = int(getattr(h, "id", 0) or 0)
+                except Exception:
+                    continue
+                if hid:
+                    host_rows.append(
+                        (
+                            hid,
+                            str(getattr(h, "name", "") or "").strip(),
+                            str(getattr(h, "address", "") or "").strip(),
+                        )
+                    )
             sem = asyncio.Semaphore(_HOST_CHECK_MAX_CONCURRENCY)
 
-            async def one(h) -> tuple[int, dict[str, Any]]:
-                async with sem:
-                    try:
-                        addr = str(getattr(h, "address", "") or "")
-                        name = str(getattr(h, "name", "") or "")
-                        icmp = await asyncio.to_thread(_check_host_icmp, addr)
-                        ssh = await asyncio.to_thread(_check_tcp_port, addr, 22, 1.0)
-                        dns = await asyncio.to_thread(_check_dns, addr, name)
-                        snmp = await asyncio.to_thread(_check_snmp_host, addr)
-                        ntp = await asyncio.to_thread(_check_ntp_server, addr)
-                        checks = {
-                            "icmp": icmp.model_dump(),
-                            "ssh": ssh.model_dump(),
-                            "dns": dns.model_dump(),
-                            "snmp": snmp.model_dump(),
-                            "ntp": ntp.model_dump(),
-                        }
-                    except Exception as e:
-                        icmp = ProtocolStatus(status="crit", checked_ts=time.time(), message=f"check error: {e}")
-                        checks = {"icmp": icmp.model_dump()}
-                    # keep legacy per-host status = ICMP
-                    return (int(getattr(h, "id", 0)), {"icmp": icmp.model_dump(), "checks": checks})
-
-            pairs = await asyncio.gather(*(one(h) for h in hosts), return_exceptions=True)
+            # Never let a cycle overrun into the next one.
+            pairs = await _gather_host_checks(
+                {row[0]: _check_host(sem, *row) for row in host_rows},
+                _HOST_CHECK_INTERVAL_S * 0.9,
+            )
             results: dict[int, dict[str, Any]] = {}
             checks_all: dict[int, dict[str, Any]] = {}
             for p in pairs:
@@ -1085,200 +1680,187 @@ async def _host_checker_loop() -> None:
                     continue
                 hid, payload = p
                 if hid:
-                    try:
-                        results[int(hid)] = dict(payload.get("icmp") or {})
-                    except Exception:
-                        results[int(hid)] = {}
-                    try:
-                        checks_all[int(hid)] = dict(payload.get("checks") or {})
-                    except Exception:
-                        checks_all[int(hid)] = {}
+                    # Fresh dicts built by _check_host() for this cycle; no need to copy.
+                    results[hid] = payload.get("icmp") or {}
+                    checks_all[hid] = payload.get("checks") or {}
 
             ts = time.time()
 
             # --- SYSTEM LOGS: emit host failure/recovery events on state changes ---
             # The dashboard's SYSTEM LOGS panel is line-based text; we broadcast
             # lightweight events over the existing websocket.
-            host_name_by_id: dict[int, str] = {}
-            host_addr_by_id: dict[int, str] = {}
-            for h in hosts:
-                try:
-                    hid = int(getattr(h, "id", 0) or 0)
-                except Exception:
-                    continue
-                if not hid:
-                    continue
-                name = str(getattr(h, "name", "") or "").strip()
-                addr = str(getattr(h, "address", "") or "").strip()
-                host_name_by_id[hid] = name or addr or f"host-{hid}"
-                host_addr_by_id[hid] = addr
-
-            async with _host_status_lock:
-                prev_statuses = dict(_host_status)
-                prev_checks = dict(_host_checks)
-
-            def _norm_status(v: Any) -> str:
-                try:
-                    return str(v or "unknown").lower().strip()
-                except Exception:
-                    return "unknown"
-
-            events: list[dict[str, Any]] = []
-            host_events: list[dict[str, Any]] = []
-
-            def _add_event(level: str, message: str) -> None:
-                events.append({"type": "log", "ts": float(ts), "level": str(level), "message": str(message)})
-
-            def _add_host_event(host_id: int, level: str, check: str, status: str, message: str) -> None:
-                try:
-                    hid = int(host_id)
-                except Exception:
-                    return
-                host_events.append(
-                    {
-                        "type": "host_event",
-                        "ts": float(ts),
-                        "level": str(level),
-                        "host_id": hid,
-                        "host_name": host_name_by_id.get(hid, f"host-{hid}"),
-                        "address": host_addr_by_id.get(hid, ""),
-                        "check": str(check),
-                        "status": str(status),
-                        "message": str(message),
-                    }
-                )
+            host_name_by_id = {hid: name or addr or f"host-{hid}" for hid, name, addr in host_rows}
+            host_addr_by_id = {hid: addr for hid, _name, addr in host_rows}
+
+            # One flat row of normalized statuses per host; the previous cycle's
+            # rows are compared by tuple instead of re-walking nested dicts.
+            # results/checks_all are keyed by int host id already.
+            status_rows = {
+                hid: _status_row(st or _EMPTY_DICT, checks_all.get(hid) or _EMPTY_DICT)
+                for hid, st in results.items()
+            }
+            prev_rows = _host_status_rows
+            _host_status_rows = status_rows
 
-            def _detail_line(proto_dump: Any) -> str:
-                """Best-effort human detail for a ProtocolStatus model_dump()."""
-                try:
-                    if not isinstance(proto_dump, dict):
-                        return ""
-                    msg = str(proto_dump.get("message") or "").strip()
-                    lat = proto_dump.get("latency_ms")
-                    parts: list[str] = []
-                    if msg:
-                        # Avoid gigantic lines.
-                        parts.append(msg[:180])
-                    if lat is not None:
-                        try:
-                            parts.append(f"{int(round(float(lat)))} ms")
-                        except Exception:
-                            pass
-                    return " · ".join(parts)
-                except Exception:
-                    return ""
+            acc = _CycleEvents(ts=ts, host_name_by_id=host_name_by_id, host_addr_by_id=host_addr_by_id)
 
-            for hid, st in results.items():
-                name = host_name_by_id.get(int(hid), f"host-{hid}")
-                new_icmp = _norm_status((st or {}).get("status"))
-                prev_icmp = _norm_status(((prev_statuses.get(int(hid)) or {}) if isinstance(prev_statuses, dict) else {}).get("status"))
+            # Steady state: if no host's status changed, there is nothing to diff.
+            for hid, row in (status_rows.items() if status_rows != prev_rows else ()):
+                prev_row = prev_rows.get(hid, _UNKNOWN_ROW)
+                if row == prev_row:
+                    continue
+                st = results[hid]
+                name = host_name_by_id.get(hid, f"host-{hid}")
+                new_icmp, prev_icmp = row[0], prev_row[0]
 
                 # ICMP: log both failure + recovery.
                 if prev_icmp != "crit" and new_icmp == "crit":
                     detail = _detail_line(st)
                     suffix = f": {detail}" if detail else ""
-                    _add_event("CRIT", f"Host {name} unreachable (ICMP){suffix}")
-                    _add_host_event(int(hid), "CRIT", "icmp", "crit", detail or "unreachable")
+                    acc.add("CRIT", f"Host {name} unreachable (ICMP){suffix}")
+                    acc.add_host(hid, "CRIT", "icmp", "crit", detail or "unreachable")
                 elif prev_icmp == "crit" and new_icmp == "ok":
-                    _add_event("INFO", f"Host {name} reachable (ICMP)")
-                    _add_host_event(int(hid), "INFO", "icmp", "ok", "reachable")
+                    acc.add("INFO", f"Host {name} reachable (ICMP)")
+                    acc.add_host(hid, "INFO", "icmp", "ok", "reachable")
 
                 # Other protocols: log transitions into critical.
-                new_host_checks = checks_all.get(int(hid)) or {}
-                prev_host_checks = prev_checks.get(int(hid)) or {}
-                for proto_key, proto_label in (
-                    ("ssh", "SSH"),
-                    ("dns", "DNS"),
-                    ("snmp", "SNMP"),
-                    ("ntp", "NTP"),
-                ):
-                    new_p = _norm_status((new_host_checks.get(proto_key) or {}).get("status"))
-                    prev_p = _norm_status((prev_host_checks.get(proto_key) or {}).get("status"))
-                    if prev_p != "crit" and new_p == "crit":
-                        detail = _detail_line(new_host_checks.get(proto_key) or {})
+                new_host_checks = checks_all.get(hid) or _EMPTY_DICT
+                for i, (proto_key, proto_label) in enumerate(_PROTO_LABELS, 1):
+                    if prev_row[i] != "crit" and row[i] == "crit":
+                        detail = _detail_line(new_host_checks.get(proto_key) or _EMPTY_DICT)
                         suffix = f": {detail}" if detail else ""
-                        _add_event("CRIT", f"Host {name} {proto_label} check failed{suffix}")
-                        _add_host_event(int(hid), "CRIT", proto_key, "crit", detail or "check failed")
-
-            async with _host_status_lock:
-                _host_status_ts = ts
-                _host_status = results
-                _host_checks_ts = ts
-                _host_checks = checks_all
+                        acc.add("CRIT", f"Host {name} {proto_label} check failed{suffix}")
+                        acc.add_host(hid, "CRIT", proto_key, "crit", detail or "check failed")
 
-            # Broadcast host check events first so the UI can show the failure as it happens.
-            for ev in events:
-                await broadcaster.broadcast(ev)
+            _host_snapshot = (ts, results, checks_all)
 
-            # Store + broadcast structured host events (Problems view).
-            if host_events:
+            # Store structured host events (Problems view).
+            if acc.host_events:
                 async with _host_events_lock:
-                    for ev in host_events:
+                    for ev in acc.host_events:
                         _host_events.append(ev)
-                for ev in host_events:
-                    await broadcaster.broadcast(ev)
-
-            # Push to connected clients (dashboard listens and updates buttons).
-            await broadcaster.broadcast(
-                {
-                    "type": "host_status",
-                    "ts": ts,
-                    "statuses": results,
-                    "checks": checks_all,
-                }
+                        _host_events_by_host[int(ev.get("host_id") or 0)].append(ev)
+
+            # Push everything in one batch: log events first so the UI shows the
+            # failure as it happens, then host events, then the status map the
+            # dashboard uses to update buttons.
+            await broadcaster.broadcast_many(
+                [
+                    *acc.events,
+                    *acc.host_events,
+                    {
+                        "type": "host_status",
+                        "ts": ts,
+                        "statuses": results,
+                        "checks": checks_all,
+                    },
+                ]
             )
+            fail_streak = 0
         except Exception:
-            # Never let this loop die.
-            pass
+            # Never let this loop die, but back off while the environment is broken
+            # (e.g. DB unreachable) instead of re-probing every host each interval.
+            fail_streak += 1
+            backoff = min(_HOST_CHECK_INTERVAL_S * (2 ** fail_streak), _HOST_CHECK_MAX_BACKOFF_S)
+            logging.getLogger("uvicorn").exception(
+                "Host checker cycle failed (%d in a row); retrying in %.0fs", fail_streak, backoff
+            )
+            await asyncio.sleep(backoff)
+            continue
+
+        # Keep a fixed cadence: the interval counts from the start of the cycle.
+        await asyncio.sleep(max(0.0, _HOST_CHECK_INTERVAL_S - (time.monotonic() - cycle_start)))
+
+
+# (monotonic ts, sample JSON, insights JSON) from the sampler's last tick, so
+# /api/metrics/latest and /api/insights polls reuse the already-encoded bytes.
+_metrics_snapshot: Optional[tuple[float, bytes, bytes]] = None
+
+
+def _fresh_metrics_snapshot() -> Optional[tuple[float, bytes, bytes]]:
+    snap = _metrics_snapshot
+    if snap is None:
+        return None
+    # Allow one missed tick before falling back to computing on demand.
+    if time.monotonic() - snap[0] > 2.0 * max(0.1, settings.sample_interval_seconds):
+        return None
+    return snap
+
 
-        await asyncio.sleep(_HOST_CHECK_INTERVAL_S)
+_prune_task: Optional[asyncio.Task] = None
+
+
+async def _prune_in_background() -> None:
+    try:
+        await prune_old()
+    except Exception:
+        logging.getLogger("uvicorn").exception("Pruning old samples failed")
 
 
 async def _sampler_loop() -> None:
+    global _metrics_snapshot, _prune_task
     # Warm up CPU percent counters
     collect_sample()
     await asyncio.sleep(0.1)
 
     last_prune = 0.0
+    next_tick = time.monotonic()
 
     while True:
         sample = collect_sample()
-        add_sample(sample)
+        sample_json = sample.model_dump_json().encode("utf-8")
+        add_sample(sample, sample_json)
         if storage.enabled:
             await persist_sample(sample)
             # prune at most once per minute
-            now = asyncio.get_event_loop().time()
-            if now - last_prune > 60.0:
+            now = time.monotonic()
+            if now - last_prune > 60.0 and (_prune_task is None or _prune_task.done()):
                 last_prune = now
-                await prune_old()
-        insights = compute_insights()
-        await broadcaster.broadcast(
-            {
-                "type": "sample",
-                "sample": sample.model_dump(),
-                "insights": insights.model_dump(),
-            }
-        )
-        await asyncio.sleep(max(0.1, settings.sample_interval_seconds))
+                # Prune off the tick so the DELETE never delays samples/broadcasts.
+                _prune_task = asyncio.create_task(_prune_in_background())
+        insights_json = compute_insights().model_dump_json().encode("utf-8")
+        _metrics_snapshot = (time.monotonic(), sample_json, insights_json)
+        if broadcaster.has_clients:
+            await broadcaster.broadcast_raw(_envelope_json("sample", sample_json, insights_json))
+        # Sleep until the next deadline on a fixed grid so per-tick overhead
+        # never accumulates as drift. After an overrun, restart the grid
+        # instead of firing a burst of catch-up ticks.
+        next_tick += max(0.1, settings.sample_interval_seconds)
+        delay = next_tick - time.monotonic()
+        if delay <= 0:
+            next_tick = time.monotonic()
+            delay = 0.0
+        await asyncio.sleep(delay)
 
 
 @app.on_event("startup")
 async def startup() -> None:
+    loop_mod = type(asyncio.get_running_loop()).__module__
+    if not loop_mod.startswith("uvloop"):
+        # uvicorn uses uvloop automatically when it is installed (see requirements.txt).
+        logging.getLogger("uvicorn").warning("Running on the stdlib asyncio loop (%s); install uvloop for lower overhead", loop_mod)
     await init_auth_storage()
     await init_storage()
     await _seed_default_admin()
     start_protocol_checker()
+    start_sample_flusher()
     asyncio.create_task(_host_checker_loop())
     asyncio.create_task(_sampler_loop())
 
 
+@app.on_event("shutdown")
+async def shutdown() -> None:
+    await broadcaster.close()
+    await stop_sample_flusher()
+    _shutdown_executors()
+
+
 async def _seed_default_admin() -> None:
     """Create default admin/admin user if the users table is empty."""
-    import logging
     try:
-        users = await asyncio.to_thread(auth_storage.get_all_users)
+        users = await _run_auth(auth_storage.get_all_users)
         if not users:
-            await asyncio.to_thread(
+            await _run_auth_write(
                 auth_storage.create_user,
                 "admin", "admin", role="admin"
             )
@@ -1309,7 +1891,7 @@ async def ws_metrics(ws: WebSocket) -> None:
         except Exception:
             remember_token = None
         if remember_token:
-            uid = await asyncio.to_thread(auth_storage.validate_remember_token, remember_token)
+            uid = await _validate_remember_token(remember_token)
             if uid is not None:
                 user_id = uid
                 try:
@@ -1325,25 +1907,22 @@ async def ws_metrics(ws: WebSocket) -> None:
     except Exception:
         await ws.close(code=4401)
         return
-    user = await asyncio.to_thread(auth_storage.get_user_by_id, uid)
+    user = await _get_user_by_id(uid)
     if user is None or not user.is_active:
         await ws.close(code=4401)
         return
 
     await ws.accept()
-    await broadcaster.add(ws)
     try:
-        # Send immediate snapshot
-        sample = latest()
-        await ws.send_text(
-            json.dumps(
-                {
-                    "type": "snapshot",
-                    "sample": sample.model_dump() if sample else None,
-                    "insights": compute_insights().model_dump(),
-                }
-            )
-        )
+        # Send immediate snapshot before registering, so it is never
+        # interleaved with the broadcaster's sender task.
+        snap = _fresh_metrics_snapshot()
+        if snap is not None:
+            # Reuse the last tick's encoded sample/insights (reconnect bursts).
+            await ws.send_bytes(_envelope_json("snapshot", snap[1], snap[2]))
+        else:
+            await ws.send_bytes(_model_envelope_json("snapshot", latest(), compute_insights()))
+        await broadcaster.add(ws)
         while True:
             # Keepalive / allow client messages
             await ws.receive_text()
@@ -1381,14 +1960,11 @@ class UserGroupUpdate(BaseModel):
     description: Optional[str] = None
     allowed_hosts: Optional[list[str]] = []
 
-@app.get("/api/admin/users")
-async def api_get_users(request: Request) -> Any:
+@admin_router.get("/users")
+async def api_get_users() -> Any:
     """Get all users (admin only)."""
-    user = await _get_current_user(request)
-    if user is None or user.role != "admin":
-        return JSONResponse({"detail": "Forbidden"}, status_code=403)
-    
-    users = await asyncio.to_thread(auth_storage.get_all_users)
+    users = await _run_auth(auth_storage.get_all_users)
+    groups_by_user = await _run_auth(auth_storage.get_groups_for_users, [u.id for u in users])
     return [
         {
             "id": u.id,
@@ -1398,20 +1974,16 @@ async def api_get_users(request: Request) -> Any:
             "is_active": u.is_active,
             "created_at": u.created_at,
             "last_login": u.last_login,
-            "user_groups": [g["id"] for g in await asyncio.to_thread(auth_storage.get_user_groups, u.id)]
+            "user_groups": [g["id"] for g in groups_by_user.get(u.id, ())]
         }
         for u in users
     ]
 
-@app.post("/api/admin/users")
-async def api_create_user(user_in: UserCreate, request: Request) -> Any:
+@admin_router.post("/users")
+async def api_create_user(user_in: UserCreate) -> Any:
     """Create a new user (admin only)."""
-    user = await _get_current_user(request)
-    if user is None or user.role != "admin":
-        return JSONResponse({"detail": "Forbidden"}, status_code=403)
-    
     try:
-        new_user = await asyncio.to_thread(
+        new_user = await _run_auth_write(
             auth_storage.create_user,
             username=user_in.username,
             password=user_in.password,
@@ -1421,8 +1993,8 @@ async def api_create_user(user_in: UserCreate, request: Request) -> Any:
         )
         
         # Add user to groups if specified
-        for group_id in user_in.user_groups or []:
-            await asyncio.to_thread(auth_storage.add_user_to_group, new_user.id, group_id)
+        if user_in.user_groups:
+            await _run_auth_write(auth_storage.set_user_groups, new_user.id, list(user_in.user_groups), [])
         
         return {
             "id": new_user.id,
@@ -1436,13 +2008,9 @@ async def api_create_user(user_in: UserCreate, request: Request) -> Any:
     except Exception as e:
         return JSONResponse({"detail": f"Failed to create user: {str(e)}"}, status_code=400)
 
-@app.put("/api/admin/users/{user_id}")
-async def api_update_user(user_id: int, user_in: UserUpdate, request: Request) -> Any:
+@admin_router.put("/users/{user_id}")
+async def api_update_user(user_id: int, user_in: UserUpdate) -> Any:
     """Update a user (admin only)."""
-    user = await _get_current_user(request)
-    if user is None or user.role != "admin":
-        return JSONResponse({"detail": "Forbidden"}, status_code=403)
-    
     try:
         # Update user fields
         update_data = {}
@@ -1457,28 +2025,30 @@ async def api_update_user(user_id: int, user_in: UserUpdate, request: Request) -
         if user_in.is_active is not None:
             update_data["is_active"] = user_in.is_active
         
-        if update_data:
-            success = await asyncio.to_thread(auth_storage.update_user, user_id, **update_data)
-            if not success:
+        if update_data or user_in.user_groups is not None:
+            result = await _run_auth_write(
+                auth_storage.apply_user_update, user_id, update_data, user_in.user_groups
+            )
+            _invalidate_user(user_id)
+            if result is None or (update_data and not result["updated"]):
                 return JSONResponse({"detail": "User not found or no changes made"}, status_code=404)
         
         return {"detail": "User updated successfully"}
     except Exception as e:
         return JSONResponse({"detail": f"Failed to update user: {str(e)}"}, status_code=400)
 
-@app.delete("/api/admin/users/{user_id}")
+@admin_router.delete("/users/{user_id}")
 async def api_delete_user(user_id: int, request: Request) -> Any:
     """Delete a user (admin only)."""
     user = await _get_current_user(request)
-    if user is None or user.role != "admin":
-        return JSONResponse({"detail": "Forbidden"}, status_code=403)
-    
+
     # Prevent self-deletion
     if user.id == user_id:
         return JSONResponse({"detail": "Cannot delete yourself"}, status_code=400)
     
     try:
-        success = await asyncio.to_thread(auth_storage.delete_user, user_id)
+        success = await _run_auth_write(auth_storage.delete_user, user_id)
+        _invalidate_user(user_id)
         if not success:
             return JSONResponse({"detail": "User not found"}, status_code=404)
         return {"detail": "User deleted successfully"}
@@ -1487,25 +2057,17 @@ async def api_delete_user(user_id: int, request: Request) -> Any:
 
 # === User Groups API Endpoints ===
 
-@app.get("/api/admin/user-groups")
-async def api_get_user_groups(request: Request) -> Any:
+@admin_router.get("/user-groups")
+async def api_get_user_groups() -> Any:
     """Get all user groups (admin only)."""
-    user = await _get_current_user(request)
-    if user is None or user.role != "admin":
-        return JSONResponse({"detail": "Forbidden"}, status_code=403)
-    
-    groups = await asyncio.to_thread(auth_storage.get_all_user_groups)
+    groups = await _run_auth(auth_storage.get_all_user_groups)
     return groups
 
-@app.post("/api/admin/user-groups")
-async def api_create_user_group(group_in: UserGroupCreate, request: Request) -> Any:
+@admin_router.post("/user-groups")
+async def api_create_user_group(group_in: UserGroupCreate) -> Any:
     """Create a new user group (admin only)."""
-    user = await _get_current_user(request)
-    if user is None or user.role != "admin":
-        return JSONResponse({"detail": "Forbidden"}, status_code=403)
-    
     try:
-        group_id = await asyncio.to_thread(
+        group_id = await _run_auth_write(
             auth_storage.create_user_group,
             name=group_in.name,
             description=group_in.description,
@@ -1515,15 +2077,11 @@ async def api_create_user_group(group_in: UserGroupCreate, request: Request) ->
     except Exception as e:
         return JSONResponse({"detail": f"Failed to create user group: {str(e)}"}, status_code=400)
 
-@app.put("/api/admin/user-groups/{group_id}")
-async def api_update_user_group(group_id: int, group_in: UserGroupUpdate, request: Request) -> Any:
+@admin_router.put("/user-groups/{group_id}")
+async def api_update_user_group(group_id: int, group_in: UserGroupUpdate) -> Any:
     """Update an existing user group (admin only)."""
-    user = await _get_current_user(request)
-    if user is None or user.role != "admin":
-        return JSONResponse({"detail": "Forbidden"}, status_code=403)
-    
     try:
-        await asyncio.to_thread(
+        await _run_auth_write(
             auth_storage.update_user_group,
             group_id=group_id,
             name=group_in.name,
@@ -1538,6 +2096,10 @@ async def api_update_user_group(group_id: int, group_in: UserGroupUpdate, reques
 
 LOGS_FILE = Path('data/system_logs.json')
 MAX_LOGS = 2000  # rolling cap
+# The logs/agent-metrics endpoints are plain `def` and run in the threadpool;
+# these locks keep their read-modify-write cycles on the JSON files atomic.
+_LOGS_LOCK = threading.Lock()
+_AGENT_METRICS_LOCK = threading.Lock()
 
 def _read_logs() -> list:
     try:
@@ -1556,21 +2118,22 @@ def _write_logs(logs: list) -> None:
 def write_log(level: str, source: str, message: str, hostname: str = '', ip: str = '') -> None:
     """Append one entry to system_logs.json (non-blocking best-effort)."""
     try:
-        logs = _read_logs()
-        logs.append({
-            'ts': time.time(),
-            'level': level,       # 'info' | 'warn' | 'error' | 'crit'
-            'source': source,
-            'hostname': hostname,
-            'ip': ip,
-            'message': message,
-        })
-        _write_logs(logs)
+        with _LOGS_LOCK:
+            logs = _read_logs()
+            logs.append({
+                'ts': time.time(),
+                'level': level,       # 'info' | 'warn' | 'error' | 'crit'
+                'source': source,
+                'hostname': hostname,
+                'ip': ip,
+                'message': message,
+            })
+            _write_logs(logs)
     except Exception as e:
         print(f"[log write error] {e}")
 
 @app.get("/api/logs")
-async def get_logs(limit: int = 200, level: str = '', hostname: str = '') -> Any:
+def get_logs(limit: int = 200, level: str = '', hostname: str = '') -> Any:
     """Return recent system log entries, newest first."""
     try:
         logs = _read_logs()
@@ -1583,7 +2146,7 @@ async def get_logs(limit: int = 200, level: str = '', hostname: str = '') -> Any
         return JSONResponse({"detail": str(e)}, status_code=500)
 
 @app.post("/api/logs")
-async def post_log(entry: dict) -> Any:
+def post_log(entry: dict) -> Any:
     """Accept a log entry from the frontend."""
     try:
         write_log(
@@ -1598,16 +2161,17 @@ async def post_log(entry: dict) -> Any:
         return JSONResponse({"detail": str(e)}, status_code=500)
 
 @app.delete("/api/logs")
-async def clear_logs() -> Any:
+def clear_logs() -> Any:
     """Clear all system logs (admin)."""
     try:
-        _write_logs([])
+        with _LOGS_LOCK:
+            _write_logs([])
         return {"status": "ok"}
     except Exception as e:
         return JSONResponse({"detail": str(e)}, status_code=500)
 
 @app.get("/api/logs/host/{hostname}")
-async def get_host_logs(hostname: str, limit: int = 100) -> Any:
+def get_host_logs(hostname: str, limit: int = 100) -> Any:
     """Return log entries for a specific host, newest first."""
     try:
         logs = _read_logs()
@@ -1618,8 +2182,17 @@ async def get_host_logs(hostname: str, limit: int = 100) -> Any:
 
 # === Agent Management API ===
 
+def _read_agent_metrics() -> Optional[dict]:
+    """Load data/agent_metrics.json, or None if no agent has reported yet."""
+    metrics_file = Path('data/agent_metrics.json')
+    if not metrics_file.exists():
+        return None
+    with open(metrics_file, 'r') as f:
+        return json.load(f)
+
+
 @app.post("/api/agent/metrics")
-async def receive_agent_metrics(metrics: dict, request: Request) -> Any:
+def receive_agent_metrics(metrics: dict, request: Request) -> Any:
     """Receive metrics from monitoring agents."""
     try:
         # Extract hostname from metrics
@@ -1632,93 +2205,94 @@ async def receive_agent_metrics(metrics: dict, request: Request) -> Any:
         # Log the received metrics with hostname
         print(f"Received metrics from agent: {hostname} ({agent_id}) IP: {ip} - OS: {os_type}")
         
-        # Store metrics in a file for now (in production, use database)
-        metrics_file = Path('data/agent_metrics.json')
-        metrics_file.parent.mkdir(exist_ok=True)
-        
-        # Read existing metrics or create new structure
-        if metrics_file.exists():
-            with open(metrics_file, 'r') as f:
-                all_metrics = json.load(f)
-        else:
-            all_metrics = {}
-        
-        # Keep rolling history (last 400 samples = ~20 min at 3s interval)
-        MAX_HISTORY = 400
-        existing = all_metrics.get(hostname, {})
-        history = existing.get('history', [])
-        history.append({
-            'ts': time.time(),
-            'cpu': metrics.get('cpu', {}).get('percent', 0),
-            'mem': metrics.get('memory', {}).get('percent', 0),
-            'disk': metrics.get('disk', {}).get('percent', 0),
-            'net_sent': metrics.get('network', {}).get('bytes_sent', 0),
-            'net_recv': metrics.get('network', {}).get('bytes_recv', 0),
-            'processes': metrics.get('processes', 0),
-            'uptime': metrics.get('uptime', 0),
-            'gpu': metrics.get('gpu') or [],
-        })
-        if len(history) > MAX_HISTORY:
-            history = history[-MAX_HISTORY:]
-
-        # Store metrics with hostname as key
-        all_metrics[hostname] = {
-            'last_seen': time.time(),
-            'hostname': hostname,
-            'ip': ip,
-            'agent_id': agent_id,
-            'os_type': os_type,
-            'metrics': metrics,
-            'history': history,
-            'discovered_at': existing.get('discovered_at', time.time())
-        }
-        
-        # Save updated metrics
-        with open(metrics_file, 'w') as f:
-            json.dump(all_metrics, f, indent=2)
-
-        # Auto-log threshold breaches (only log every ~30s per host to avoid spam)
-        cpu_pct  = metrics.get('cpu', {}).get('percent', 0)
-        mem_pct  = metrics.get('memory', {}).get('percent', 0)
-        disk_pct = metrics.get('disk', {}).get('percent', 0)
-        prev_log_ts = existing.get('last_problem_log_ts', 0)
-        now_ts = time.time()
-        if now_ts - prev_log_ts >= 30:
-            problems = []
-            if cpu_pct >= 90:
-                problems.append(f"CPU critical: {cpu_pct:.1f}%")
-            elif cpu_pct >= 75:
-                problems.append(f"CPU high: {cpu_pct:.1f}%")
-            if mem_pct >= 90:
-                problems.append(f"RAM critical: {mem_pct:.1f}%")
-            elif mem_pct >= 80:
-                problems.append(f"RAM high: {mem_pct:.1f}%")
-            if disk_pct >= 95:
-                problems.append(f"Disk critical: {disk_pct:.1f}%")
-            elif disk_pct >= 85:
-                problems.append(f"Disk high: {disk_pct:.1f}%")
-            gpu_list = metrics.get('gpu') or []
-            if isinstance(gpu_list, list):
-                for g in gpu_list:
-                    gidx = g.get('index', 0)
-                    gpct = g.get('percent', 0)
-                    gtemp = g.get('temperature')
-                    if gpct >= 95:
-                        problems.append(f"GPU {gidx} critical: {gpct:.1f}%")
-                    elif gpct >= 85:
-                        problems.append(f"GPU {gidx} high: {gpct:.1f}%")
-                    if gtemp is not None:
-                        if gtemp >= 90:
-                            problems.append(f"GPU {gidx} temp critical: {gtemp:.0f}°C")
-                        elif gtemp >= 80:
-                            problems.append(f"GPU {gidx} temp high: {gtemp:.0f}°C")
-            if problems:
-                level = 'crit' if any('critical' in p for p in problems) else 'warn'
-                write_log(level=level, source='agent', hostname=hostname, ip=ip,
-                          message='; '.join(problems))
-                all_metrics[hostname]['last_problem_log_ts'] = now_ts
-                with open(metrics_file, 'w') as f:
-                    json.dump(all_metrics, f, indent=2)
+        with _AGENT_METRICS_LOCK:
+            # Store metrics in a file for now (in production, use database)
+            metrics_file = Path('data/agent_metrics.json')
+            metrics_file.parent.mkdir(exist_ok=True)
+
+            # Read existing metrics or create new structure
+            if metrics_file.exists():
+                with open(metrics_file, 'r') as f:
+                    all_metrics = json.load(f)
+            else:
+                all_metrics = {}
+
+            # Keep rolling history (last 400 samples = ~20 min at 3s interval)
+            MAX_HISTORY = 400
+            existing = all_metrics.get(hostname, {})
+            history = existing.get('history', [])
+            history.append({
+                'ts': time.time(),
+                'cpu': metrics.get('cpu', {}).get('percent', 0),
+                'mem': metrics.get('memory', {}).get('percent', 0),
+                'disk': metrics.get('disk', {}).get('percent', 0),
+                'net_sent': metrics.get('network', {}).get('bytes_sent', 0),
+                'net_recv': metrics.get('network', {}).get('bytes_recv', 0),
+                'processes': metrics.get('processes', 0),
+                'uptime': metrics.get('uptime', 0),
+                'gpu': metrics.get('gpu') or [],
+            })
+            if len(history) > MAX_HISTORY:
+                history = history[-MAX_HISTORY:]
+
+            # Store metrics with hostname as key
+            all_metrics[hostname] = {
+                'last_seen': time.time(),
+                'hostname': hostname,
+                'ip': ip,
+                'agent_id': agent_id,
+                'os_type': os_type,
+                'metrics': metrics,
+                'history': history,
+                'discovered_at': existing.get('discovered_at', time.time())
+            }
+
+            # Save updated metrics
+            with open(metrics_file, 'w') as f:
+                json.dump(all_metrics, f, indent=2)
+
+            # Auto-log threshold breaches (only log every ~30s per host to avoid spam)
+            cpu_pct  = metrics.get('cpu', {}).get('percent', 0)
+            mem_pct  = metrics.get('memory', {}).get('percent', 0)
+            disk_pct = metrics.get('disk', {}).get('percent', 0)
+            prev_log_ts = existing.get('last_problem_log_ts', 0)
+            now_ts = time.time()
+            if now_ts - prev_log_ts >= 30:
+                problems = []
+                if cpu_pct >= 90:
+                    problems.append(f"CPU critical: {cpu_pct:.1f}%")
+                elif cpu_pct >= 75:
+                    problems.append(f"CPU high: {cpu_pct:.1f}%")
+                if mem_pct >= 90:
+                    problems.append(f"RAM critical: {mem_pct:.1f}%")
+                elif mem_pct >= 80:
+                    problems.append(f"RAM high: {mem_pct:.1f}%")
+                if disk_pct >= 95:
+                    problems.append(f"Disk critical: {disk_pct:.1f}%")
+                elif disk_pct >= 85:
+                    problems.append(f"Disk high: {disk_pct:.1f}%")
+                gpu_list = metrics.get('gpu') or []
+                if isinstance(gpu_list, list):
+                    for g in gpu_list:
+                        gidx = g.get('index', 0)
+                        gpct = g.get('percent', 0)
+                        gtemp = g.get('temperature')
+                        if gpct >= 95:
+                            problems.append(f"GPU {gidx} critical: {gpct:.1f}%")
+                        elif gpct >= 85:
+                            problems.append(f"GPU {gidx} high: {gpct:.1f}%")
+                        if gtemp is not None:
+                            if gtemp >= 90:
+                                problems.append(f"GPU {gidx} temp critical: {gtemp:.0f}°C")
+                            elif gtemp >= 80:
+                                problems.append(f"GPU {gidx} temp high: {gtemp:.0f}°C")
+                if problems:
+                    level = 'crit' if any('critical' in p for p in problems) else 'warn'
+                    write_log(level=level, source='agent', hostname=hostname, ip=ip,
+                              message='; '.join(problems))
+                    all_metrics[hostname]['last_problem_log_ts'] = now_ts
+                    with open(metrics_file, 'w') as f:
+                        json.dump(all_metrics, f, indent=2)
 
         return {"status": "success", "message": f"Metrics received from {hostname}"}
     
@@ -1730,16 +2304,13 @@ async def receive_agent_metrics(metrics: dict, request: Request) -> Any:
 async def get_host_agent_metrics(host_id: int) -> Any:
     """Return latest snapshot + history for a specific host by ID."""
     try:
-        hosts = await db_get_hosts(active_only=False)
-        host = next((h for h in hosts if h.id == int(host_id)), None)
+        host = await db_get_host_by_id(int(host_id))
         if not host:
             return JSONResponse({"detail": "Host not found"}, status_code=404)
 
-        metrics_file = Path('data/agent_metrics.json')
-        if not metrics_file.exists():
+        all_metrics = await asyncio.to_thread(_read_agent_metrics)
+        if all_metrics is None:
             return {"found": False}
-        with open(metrics_file, 'r') as f:
-            all_metrics = json.load(f)
 
         # Match by IP or hostname
         address = str(host.address or "").strip()
@@ -1792,7 +2363,7 @@ async def get_host_agent_metrics(host_id: int) -> Any:
 
 
 @app.get("/api/agent/status")
-async def get_agent_status() -> Any:
+def get_agent_status() -> Any:
     """Return agent online/offline status keyed by IP address and hostname."""
     try:
         metrics_file = Path('data/agent_metrics.json')
@@ -1822,7 +2393,7 @@ async def get_agent_status() -> Any:
 
 
 @app.get("/api/agent/metrics")
-async def get_agent_metrics() -> Any:
+def get_agent_metrics() -> Any:
     """Get all agent metrics."""
     try:
         metrics_file = Path('data/agent_metrics.json')
@@ -1852,45 +2423,56 @@ async def get_agent_metrics() -> Any:
 
 # === Discovery API ===
 
+_NET_VENDOR_KEYWORDS = ("cisco ios", "juniper", "junos", "extreme networks", "aruba", "hp procurve",
+                        "dell powerconnect", "netgear gs", "catalyst", "nexus", "3com")
+_VENDOR_SWITCH_KEYWORDS = ("switch", "catalyst", "nexus", "gs", "powerconnect", "procurve")
+_VENDOR_ROUTER_KEYWORDS = ("router", "asr", "isr", "mx series", "srx")
+_VENDOR_FIREWALL_KEYWORDS = ("firewall", "asa", "pix", "fortigate", "pfsense", "checkpoint", "srx")
+_FIREWALL_KEYWORDS = ("pfsense", "opnsense", "fortigate", "checkpoint", "asa", "firewall", "netscreen")
+_SWITCH_KEYWORDS = ("switch", "catalyst", "nexus", "procurve", "powerconnect")
+_ROUTER_KEYWORDS = ("router", "asr", "isr", "mikrotik", "routeros")
+_SERVER_OS_KEYWORDS = ("linux", "ubuntu", "debian", "centos", "rhel", "rocky", "fedora",
+                       "windows", "microsoft", "freebsd", "proxmox", "esxi", "vmware")
+_HTTP_PORTS = frozenset({80, 443, 8080, 8443})
+_ROUTING_PORTS = frozenset({179, 520, 521})
+
+
 def _classify_device_type(ip: str, open_ports: set, snmp_sysdescr: str) -> str:
     """Classify a discovered device into a device type based on open ports and SNMP sysDescr."""
     desc = (snmp_sysdescr or "").lower()
 
     # SNMP sysDescr keyword matching (most reliable)
-    if any(k in desc for k in ("cisco ios", "juniper", "junos", "extreme networks", "aruba", "hp procurve",
-                                "dell powerconnect", "netgear gs", "catalyst", "nexus", "3com")):
-        if any(k in desc for k in ("switch", "catalyst", "nexus", "gs", "powerconnect", "procurve")):
-            return "switch"
-        if any(k in desc for k in ("router", "asr", "isr", "mx series", "srx")):
-            return "router"
-        if any(k in desc for k in ("firewall", "asa", "pix", "fortigate", "pfsense", "checkpoint", "srx")):
+    if desc:
+        if any(k in desc for k in _NET_VENDOR_KEYWORDS):
+            if any(k in desc for k in _VENDOR_SWITCH_KEYWORDS):
+                return "switch"
+            if any(k in desc for k in _VENDOR_ROUTER_KEYWORDS):
+                return "router"
+            if any(k in desc for k in _VENDOR_FIREWALL_KEYWORDS):
+                return "firewall"
+
+        if any(k in desc for k in _FIREWALL_KEYWORDS):
             return "firewall"
 
-    if any(k in desc for k in ("pfsense", "opnsense", "fortigate", "checkpoint", "asa", "firewall", "netscreen")):
-        return "firewall"
-
-    if any(k in desc for k in ("switch", "catalyst", "nexus", "procurve", "powerconnect")):
-        return "switch"
+        if any(k in desc for k in _SWITCH_KEYWORDS):
+            return "switch"
 
-    if any(k in desc for k in ("router", "asr", "isr", "mikrotik", "routeros")):
-        return "router"
+        if any(k in desc for k in _ROUTER_KEYWORDS):
+            return "router"
 
-    if any(k in desc for k in ("linux", "ubuntu", "debian", "centos", "rhel", "rocky", "fedora",
-                                "windows", "microsoft", "freebsd", "proxmox", "esxi", "vmware")):
-        return "rack-server"
+        if any(k in desc for k in _SERVER_OS_KEYWORDS):
+            return "rack-server"
 
     # Port-based heuristics
+    # Firewall/router: BGP or routing ports, no SSH server services
+    if not _ROUTING_PORTS.isdisjoint(open_ports):
+        return "router"
+
     has_ssh = 22 in open_ports
-    has_http = 80 in open_ports or 443 in open_ports or 8080 in open_ports or 8443 in open_ports
+    has_http = not _HTTP_PORTS.isdisjoint(open_ports)
     has_telnet = 23 in open_ports
     has_snmp = 161 in open_ports
     has_rdp = 3389 in open_ports
-    has_bgp = 179 in open_ports
-    has_ospf_port = 520 in open_ports or 521 in open_ports
-
-    # Firewall/router: BGP or routing ports, no SSH server services
-    if has_bgp or has_ospf_port:
-        return "router"
 
     # Telnet + SNMP + no SSH = likely network device
     if has_telnet and has_snmp and not has_ssh:
@@ -1920,16 +2502,27 @@ def _classify_device_type(ip: str, open_ports: set, snmp_sysdescr: str) -> str:
     return "rack-server"
 
 
-def _probe_ports_sync(ip: str, ports: list, timeout: float = 0.8) -> set:
-    """Synchronously probe a list of TCP ports; return set of open ones."""
-    open_ports = set()
-    for port in ports:
-        try:
-            with socket.create_connection((ip, port), timeout=timeout):
-                open_ports.add(port)
-        except Exception:
-            pass
-    return open_ports
+_NMAP_REPORT_RE = re.compile(r'Nmap scan report for (?:\S+ \()?(\d+\.\d+\.\d+\.\d+)\)?')
+
+
+async def _probe_port(ip: str, port: int, timeout: float) -> bool:
+    """Return True when a TCP connection to ip:port succeeds within timeout."""
+    try:
+        _reader, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), timeout=timeout)
+    except Exception:
+        return False
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except Exception:
+        pass
+    return True
+
+
+async def _probe_ports(ip: str, ports: list, timeout: float = 0.8) -> set:
+    """Probe a list of TCP ports concurrently; return set of open ones."""
+    results = await asyncio.gather(*(_probe_port(ip, port, timeout) for port in ports))
+    return {port for port, is_open in zip(ports, results) if is_open}
 
 
 def _snmp_sysdescr_sync(ip: str, community: str = "public", timeout: float = 1.5) -> str:
@@ -1954,12 +2547,9 @@ def _snmp_sysdescr_sync(ip: str, community: str = "public", timeout: float = 1.5
 @app.post("/api/discovery/start")
 async def start_discovery() -> Any:
     """Scan network, discover hosts, and save new ones to the database."""
-    import asyncio, re, socket
-
     # Detect local server IP and network dynamically
-    import socket as _sock
     try:
-        s = _sock.socket(_sock.AF_INET, _sock.SOCK_DGRAM)
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         s.connect(("8.8.8.8", 80))
         server_ip = s.getsockname()[0]
         s.close()
@@ -1975,33 +2565,54 @@ async def start_discovery() -> Any:
         stdout, _ = await asyncio.wait_for(proc.communicate(), timeout=90)
         return stdout.decode()
 
+    ping_sem = asyncio.Semaphore(32)
+
     async def ping_host(ip):
-        try:
-            proc = await asyncio.create_subprocess_shell(
-                f"ping -c 1 -W 1 {ip}",
-                stdout=asyncio.subprocess.DEVNULL,
-                stderr=asyncio.subprocess.DEVNULL,
-            )
-            await asyncio.wait_for(proc.wait(), timeout=3)
+        async with ping_sem:
+            try:
+                proc = await asyncio.create_subprocess_exec(
+                    "ping", "-n", "-c", "1", "-W", "1", ip,
+                    stdout=asyncio.subprocess.DEVNULL,
+                    stderr=asyncio.subprocess.DEVNULL,
+                )
+            except Exception:
+                return False
+            try:
+                await asyncio.wait_for(proc.wait(), timeout=1.5)
+            except Exception:
+                try:
+                    proc.kill()
+                except Exception:
+                    pass
+                return False
             return proc.returncode == 0
-        except Exception:
-            return False
 
     # nmap ping scan
     nmap_ips = set()
     try:
         output = await run(f"nmap -sn --host-timeout 3s {network}")
-        nmap_ips = set(re.findall(r'Nmap scan report for (?:\S+ \()?(\d+\.\d+\.\d+\.\d+)\)?', output))
+        nmap_ips = set(_NMAP_REPORT_RE.findall(output))
     except Exception:
         pass
 
     # Parallel ping sweep for the full /24 (catches hosts nmap misses)
-    import ipaddress
     all_ips = [str(ip) for ip in ipaddress.ip_network(network, strict=False).hosts()
                if not str(ip).endswith('.255')]
-    ping_tasks = [ping_host(ip) for ip in all_ips]
-    ping_results = await asyncio.gather(*ping_tasks)
-    ping_ips = {ip for ip, alive in zip(all_ips, ping_results) if alive}
+    ping_ips: set[str] = set()
+    swept = False
+    if icmp_async_multiping is not None:
+        # One pool of unprivileged ICMP sockets instead of a ping process per IP.
+        try:
+            replies = await icmp_async_multiping(
+                all_ips, count=1, timeout=1, concurrent_tasks=64, privileged=False
+            )
+            ping_ips = {r.address for r in replies if r.is_alive}
+            swept = True
+        except Exception:
+            swept = False
+    if not swept:
+        ping_results = await asyncio.gather(*(ping_host(ip) for ip in all_ips))
+        ping_ips = {ip for ip, alive in zip(all_ips, ping_results) if alive}
 
     # Combine both sets — include all IPs including the server itself
     found_ips = sorted(nmap_ips | ping_ips | {server_ip})
@@ -2019,10 +2630,12 @@ async def start_discovery() -> Any:
 
     async def classify_ip(ip: str) -> tuple[str, str, str]:
         """Returns (ip, hostname, device_type)."""
+        hostname = f"host-{ip.split('.')[-1]}"
         try:
-            hostname = socket.gethostbyaddr(ip)[0]
+            name, _port = await asyncio.get_running_loop().getnameinfo((ip, 0), socket.NI_NAMEREQD)
+            hostname = name or hostname
         except Exception:
-            hostname = f"host-{ip.split('.')[-1]}"
+            pass
         if ip == server_ip:
             try:
                 hostname = socket.gethostname()
@@ -2031,7 +2644,7 @@ async def start_discovery() -> Any:
 
         # Run port probe + SNMP in thread pool concurrently
         open_ports, sysdescr = await asyncio.gather(
-            asyncio.to_thread(_probe_ports_sync, ip, PROBE_PORTS, 0.8),
+            _probe_ports(ip, PROBE_PORTS, 0.8),
             asyncio.to_thread(_snmp_sysdescr_sync, ip, SNMP_COMMUNITY, 1.5),
         )
         device_type = _classify_device_type(ip, open_ports, sysdescr)
@@ -2046,17 +2659,19 @@ async def start_discovery() -> Any:
     classify_tasks = [classify_limited(ip) for ip in found_ips if ip not in existing_addresses]
     classifications = await asyncio.gather(*classify_tasks, return_exceptions=True)
 
-    added = []
+    new_hosts = []
     for result in classifications:
         if isinstance(result, Exception):
             continue
         ip, hostname, device_type = result
-        try:
-            from app.models import HostCreate as HC
-            await db_create_host(HC(name=hostname, address=ip, type=device_type, tags=[], notes=None))
-            added.append({"ip": ip, "type": device_type})
-        except Exception:
-            pass
+        new_hosts.append(HostCreate(name=hostname, address=ip, type=device_type, tags=[], notes=None))
+
+    added = []
+    try:
+        created = await db_create_hosts(new_hosts)
+        added = [{"ip": h.address, "type": h.type} for h in created]
+    except Exception:
+        logging.getLogger("uvicorn").exception("Failed to save %d discovered hosts", len(new_hosts))
 
     return {
         "status": "done",
@@ -2071,24 +2686,28 @@ async def start_discovery() -> Any:
 @app.get("/logs", response_class=HTMLResponse)
 async def logs_page(request: Request):
     """Serve the system logs page."""
-    return FileResponse("app/static/logs.html")
+    return _html_page_response(request, "app/static/logs.html")
 
 @app.get("/hosts", response_class=HTMLResponse)
 async def hosts_page(request: Request):
     """Serve the hosts management page."""
-    return FileResponse("app/static/hosts.html")
+    return _html_page_response(request, "app/static/hosts.html")
 
 @app.get("/maps", response_class=HTMLResponse)
 async def maps_page(request: Request):
     """Serve the network maps page."""
-    return FileResponse("app/static/maps.html")
+    return _html_page_response(request, "app/static/maps.html")
 
 @app.get("/users", response_class=HTMLResponse)
 async def users_page(request: Request):
     """Serve the user management page."""
-    return FileResponse("app/static/users.html")
+    return _html_page_response(request, "app/static/users.html")
 
 @app.get("/user-groups", response_class=HTMLResponse)
 async def user_groups_page(request: Request):
     """Serve the user groups management page."""
-    return FileResponse("app/static/user-groups.html")
+    return _html_page_response(request, "app/static/user-groups.html")
+
+
+# Registered last so every @admin_router route above is included.
+app.include_router(admin_router)
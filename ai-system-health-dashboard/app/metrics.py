@@ -1,10 +1,14 @@
 from __future__ import annotations
 
+import atexit
+import heapq
 import socket
 import subprocess
+import threading
 import time
 from collections import deque
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from itertools import islice
 from typing import Deque, Optional
 
 import psutil
@@ -13,10 +17,19 @@ from .config import settings
 from .protocols import get_protocols_snapshot
 from .models import DiskUsage, GpuDevice, NetIO, SystemSample
 
+# Optional dependency (nvidia-ml-py): in-process NVML instead of nvidia-smi.
+try:
+    import pynvml  # type: ignore
+except Exception:  # pragma: no cover
+    pynvml = None
+
 
 @dataclass
 class MetricsStore:
     history: Deque[SystemSample]
+    # JSON encoding of each entry in ``history`` (same order and maxlen), so
+    # /api/metrics/history can splice it instead of re-dumping every sample.
+    history_json: Deque[bytes] = field(default_factory=deque)
 
     def maxlen(self) -> int:
         return max(1, int(settings.history_seconds / max(settings.sample_interval_seconds, 0.1)))
@@ -29,7 +42,9 @@ def get_store() -> MetricsStore:
     global _store
     if _store is None:
         _store = MetricsStore(history=deque(maxlen=1))
-        _store.history = deque(maxlen=_store.maxlen())
+        maxlen = _store.maxlen()
+        _store.history = deque(maxlen=maxlen)
+        _store.history_json = deque(maxlen=maxlen)
     return _store
 
 
@@ -45,27 +60,41 @@ def _safe_getloadavg() -> tuple[Optional[float], Optional[float], Optional[float
             return None, None, None
 
 
+# Mount points change rarely; re-enumerate partitions at most this often.
+_PARTITIONS_TTL_SECONDS = 30.0
+_mountpoints_cache: list[str] = []
+_mountpoints_ts = 0.0
+
+
+def _mountpoints() -> list[str]:
+    global _mountpoints_cache, _mountpoints_ts
+    now = time.monotonic()
+    if _mountpoints_ts and now - _mountpoints_ts < _PARTITIONS_TTL_SECONDS:
+        return _mountpoints_cache
+    # Skip pseudo/permission denied mounts; sorted for stable ordering.
+    _mountpoints_cache = sorted(
+        {part.mountpoint for part in psutil.disk_partitions(all=False) if part.fstype != ""}
+    )
+    _mountpoints_ts = now
+    return _mountpoints_cache
+
+
 def _disk_usages() -> list[DiskUsage]:
     disks: list[DiskUsage] = []
-    for part in psutil.disk_partitions(all=False):
-        # Skip pseudo/permission denied mounts
-        if part.fstype == "":
-            continue
+    for mountpoint in _mountpoints():
         try:
-            usage = psutil.disk_usage(part.mountpoint)
+            usage = psutil.disk_usage(mountpoint)
         except Exception:
             continue
         disks.append(
             DiskUsage(
-                mount=part.mountpoint,
+                mount=mountpoint,
                 total_bytes=int(usage.total),
                 used_bytes=int(usage.used),
                 free_bytes=int(usage.free),
                 percent=float(usage.percent),
             )
         )
-    # Prefer stable ordering
-    disks.sort(key=lambda d: d.mount)
     return disks
 
 
@@ -81,55 +110,55 @@ def _disk_health(disks: list[DiskUsage]) -> str:
     return "ok"
 
 
-def _gpu_devices() -> list[GpuDevice]:
-    """Best-effort NVIDIA GPU probe using nvidia-smi.
+# NVML device handles, resolved once per process (None = not initialised yet).
+_nvml_handles: Optional[list] = None
+_nvml_failed = False
 
-    Returns [] if not available.
-    """
+
+def _nvml_device_handles() -> Optional[list]:
+    """Initialise NVML once and cache the device handles; None if unavailable."""
+    global _nvml_handles, _nvml_failed
+    if _nvml_handles is not None:
+        return _nvml_handles
+    if pynvml is None or _nvml_failed:
+        return None
     try:
-        proc = subprocess.run(
-            [
-                "nvidia-smi",
-                "--query-gpu=name,utilization.gpu,memory.used,memory.total,temperature.gpu",
-                "--format=csv,noheader,nounits",
-            ],
-            capture_output=True,
-            text=True,
-            timeout=0.8,
-            check=False,
-        )
+        pynvml.nvmlInit()
+        handles = [pynvml.nvmlDeviceGetHandleByIndex(i) for i in range(pynvml.nvmlDeviceGetCount())]
     except Exception:
-        return []
-    if proc.returncode != 0 or not proc.stdout:
-        return []
-
-    out: list[GpuDevice] = []
-    for line in proc.stdout.strip().splitlines():
-        parts = [p.strip() for p in line.split(",")]
-        if not parts:
-            continue
-        name = parts[0] if len(parts) > 0 else "GPU"
-
-        def _to_float(s: str) -> Optional[float]:
-            try:
-                return float(s)
-            except Exception:
-                return None
-
-        def _to_int(s: str) -> Optional[int]:
-            try:
-                return int(float(s))
-            except Exception:
-                return None
+        _nvml_failed = True
+        return None
+    atexit.register(pynvml.nvmlShutdown)
+    _nvml_handles = handles
+    return handles
 
-        util = _to_float(parts[1]) if len(parts) > 1 else None
-        mem_used = _to_int(parts[2]) if len(parts) > 2 else None
-        mem_total = _to_int(parts[3]) if len(parts) > 3 else None
-        temp = _to_float(parts[4]) if len(parts) > 4 else None
 
+def _nvml_gpu_devices(handles: list) -> list[GpuDevice]:
+    out: list[GpuDevice] = []
+    for h in handles:
+        try:
+            name = pynvml.nvmlDeviceGetName(h)
+            if isinstance(name, bytes):
+                name = name.decode("utf-8", "replace")
+        except Exception:
+            name = "GPU"
+        try:
+            util: Optional[float] = float(pynvml.nvmlDeviceGetUtilizationRates(h).gpu)
+        except Exception:
+            util = None
+        try:
+            mem = pynvml.nvmlDeviceGetMemoryInfo(h)
+            mem_used: Optional[int] = int(mem.used) // (1024 * 1024)
+            mem_total: Optional[int] = int(mem.total) // (1024 * 1024)
+        except Exception:
+            mem_used = mem_total = None
+        try:
+            temp: Optional[float] = float(pynvml.nvmlDeviceGetTemperature(h, pynvml.NVML_TEMPERATURE_GPU))
+        except Exception:
+            temp = None
         out.append(
             GpuDevice(
-                name=name,
+                name=str(name),
                 util_percent=util,
                 mem_used_mb=mem_used,
                 mem_total_mb=mem_total,
@@ -139,6 +168,128 @@ def _gpu_devices() -> list[GpuDevice]:
     return out
 
 
+def _gpu_devices() -> list[GpuDevice]:
+    """Best-effort NVIDIA GPU probe.
+
+    Uses cached NVML handles (pynvml) when available, falling back to
+    nvidia-smi. Returns [] if not available.
+    """
+    handles = _nvml_device_handles()
+    if handles is not None:
+        return _nvml_gpu_devices(handles)
+    return _smi_stream.devices()
+
+
+def _to_float(s: str) -> Optional[float]:
+    try:
+        return float(s)
+    except Exception:
+        return None
+
+
+def _to_int(s: str) -> Optional[int]:
+    try:
+        return int(float(s))
+    except Exception:
+        return None
+
+
+def _parse_smi_line(line: str) -> Optional[tuple[int, GpuDevice]]:
+    """Parse one ``index,name,util,mem_used,mem_total,temp`` CSV line."""
+    parts = [p.strip() for p in line.split(",")]
+    index = _to_int(parts[0]) if parts else None
+    if index is None:
+        return None
+    return index, GpuDevice(
+        name=parts[1] if len(parts) > 1 else "GPU",
+        util_percent=_to_float(parts[2]) if len(parts) > 2 else None,
+        mem_used_mb=_to_int(parts[3]) if len(parts) > 3 else None,
+        mem_total_mb=_to_int(parts[4]) if len(parts) > 4 else None,
+        temp_c=_to_float(parts[5]) if len(parts) > 5 else None,
+    )
+
+
+class _NvidiaSmiStream:
+    """One long-lived ``nvidia-smi -lms`` process instead of a spawn per sample.
+
+    A reader thread keeps the latest line per GPU index; devices() returns
+    that snapshot. The process is restarted (at most every 30s) if it exits.
+    """
+
+    _RESTART_BACKOFF_S = 30.0
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._latest: dict[int, GpuDevice] = {}
+        self._proc: Optional[subprocess.Popen] = None
+        self._started_ts = 0.0
+        self._first_line = threading.Event()
+        self._missing = False
+        # One hook for the object's lifetime; it kills whichever process is current.
+        atexit.register(self._kill)
+
+    def _kill(self) -> None:
+        proc = self._proc
+        if proc is not None and proc.poll() is None:
+            proc.kill()
+
+    def _start(self) -> None:
+        interval_ms = max(100, int(max(settings.sample_interval_seconds, 0.1) * 1000))
+        self._started_ts = time.monotonic()
+        self._first_line.clear()
+        try:
+            self._proc = subprocess.Popen(
+                [
+                    "nvidia-smi",
+                    "--query-gpu=index,name,utilization.gpu,memory.used,memory.total,temperature.gpu",
+                    "--format=csv,noheader,nounits",
+                    "-lms",
+                    str(interval_ms),
+                ],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+            )
+        except FileNotFoundError:
+            # No NVIDIA driver tools on this host; stop trying.
+            self._missing = True
+            return
+        except Exception:
+            self._proc = None
+            return
+        threading.Thread(target=self._reader, args=(self._proc,), name="nvidia-smi", daemon=True).start()
+
+    def _reader(self, proc: subprocess.Popen) -> None:
+        assert proc.stdout is not None
+        for line in proc.stdout:
+            parsed = _parse_smi_line(line)
+            if parsed is None:
+                continue
+            with self._lock:
+                self._latest[parsed[0]] = parsed[1]
+            self._first_line.set()
+        with self._lock:
+            self._latest = {}
+
+    def devices(self) -> list[GpuDevice]:
+        if self._missing:
+            return []
+        proc = self._proc
+        if proc is None or proc.poll() is not None:
+            if self._started_ts and time.monotonic() - self._started_ts < self._RESTART_BACKOFF_S:
+                return []
+            self._start()
+            if self._proc is None:
+                return []
+            # Give the first reading a moment so the first sample is not empty.
+            self._first_line.wait(0.8)
+        with self._lock:
+            return [self._latest[i] for i in sorted(self._latest)]
+
+
+_smi_stream = _NvidiaSmiStream()
+
+
 def _gpu_health(gpus: list[GpuDevice]) -> str:
     """Derived GPU health status.
 
@@ -190,24 +341,38 @@ def _gpu_health(gpus: list[GpuDevice]) -> str:
     return worst
 
 
+# PID -> Process, kept across samples so cpu_percent() has its previous
+# reading and no Process objects are rebuilt per tick.
+_proc_cache: dict[int, psutil.Process] = {}
+
+
 def _top_processes(limit: int = 5) -> list[dict]:
-    procs: list[dict] = []
-    for p in psutil.process_iter(attrs=["pid", "name", "memory_percent"]):
+    try:
+        pids = psutil.pids()
+    except Exception:
+        return []
+    alive = set(pids)
+    for pid in [pid for pid in _proc_cache if pid not in alive]:
+        del _proc_cache[pid]
+
+    rows: list[tuple[float, float, int, str]] = []
+    for pid in pids:
+        p = _proc_cache.get(pid)
         try:
-            cpu = p.cpu_percent(interval=None)
-            info = p.info
-            procs.append(
-                {
-                    "pid": info.get("pid"),
-                    "name": info.get("name"),
-                    "cpu_percent": float(cpu),
-                    "mem_percent": float(info.get("memory_percent") or 0.0),
-                }
-            )
+            if p is None:
+                p = _proc_cache[pid] = psutil.Process(pid)
+            with p.oneshot():
+                cpu = float(p.cpu_percent(interval=None))
+                mem = float(p.memory_percent() or 0.0)
+                name = p.name()
         except Exception:
+            _proc_cache.pop(pid, None)
             continue
-    procs.sort(key=lambda x: (x.get("cpu_percent", 0.0), x.get("mem_percent", 0.0)), reverse=True)
-    return procs[:limit]
+        rows.append((cpu, mem, pid, name))
+    return [
+        {"pid": pid, "name": name, "cpu_percent": cpu, "mem_percent": mem}
+        for cpu, mem, pid, name in heapq.nlargest(limit, rows, key=lambda r: (r[0], r[1]))
+    ]
 
 
 def _cpu_freq_mhz() -> Optional[float]:
@@ -307,12 +472,12 @@ def collect_sample() -> SystemSample:
     )
 
 
-def add_sample(sample: SystemSample) -> None:
+def add_sample(sample: SystemSample, sample_json: Optional[bytes] = None) -> None:
+    """Append a sample; pass its JSON encoding if the caller already has it."""
     store = get_store()
-    # Ensure deque maxlen reflects current settings
-    if store.history.maxlen != store.maxlen():
-        store.history = deque(store.history, maxlen=store.maxlen())
+    # Settings are frozen, so the deques keep the maxlen get_store() gave them.
     store.history.append(sample)
+    store.history_json.append(sample_json if sample_json is not None else sample.model_dump_json().encode("utf-8"))
 
 
 def latest() -> Optional[SystemSample]:
@@ -328,3 +493,23 @@ def history(seconds: int) -> list[SystemSample]:
         return []
     cutoff = time.time() - max(1, seconds)
     return [s for s in store.history if s.ts >= cutoff]
+
+
+def history_json(seconds: int, require_full: bool = False) -> Optional[bytes]:
+    """JSON array of the samples from the last ``seconds``, spliced from cache.
+
+    With ``require_full`` returns None when the in-memory history does not
+    reach back that far (e.g. shortly after startup), so callers can fall
+    back to the database.
+    """
+    store = get_store()
+    cutoff = time.time() - max(1, seconds)
+    if require_full and len(store.history) != store.history.maxlen:
+        if not store.history or store.history[0].ts > cutoff + max(settings.sample_interval_seconds, 0.1):
+            return None
+    start = len(store.history)
+    for i, s in enumerate(store.history):
+        if s.ts >= cutoff:
+            start = i
+            break
+    return b"[" + b",".join(islice(store.history_json, start, None)) + b"]"
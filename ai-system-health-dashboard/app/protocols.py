@@ -2,7 +2,6 @@ from __future__ import annotations
 
 import asyncio
 import errno
-import re
 import socket
 import subprocess
 import threading
@@ -19,6 +18,11 @@ try:
 except Exception:  # pragma: no cover
     ntplib = None
 
+try:
+    from icmplib import ping as icmp_ping  # type: ignore
+except Exception:  # pragma: no cover
+    icmp_ping = None
+
 
 try:
     import subprocess  # type: ignore
@@ -80,7 +84,30 @@ def _check_ntp() -> ProtocolStatus:
     return ProtocolStatus(status=status, checked_ts=ts, latency_ms=float(latency_ms), message=server)
 
 
-_PING_RE = re.compile(r"time[=<]?\s*([0-9.]+)\s*ms", re.IGNORECASE)
+def parse_ping_rtt(out: bytes) -> Optional[float]:
+    """RTT in ms from ``ping`` output (``time=0.42 ms`` / ``time<1ms``), or None.
+
+    A plain find/scan on the reply line; no regex engine or Match objects.
+    """
+    _head, sep, reply = out.partition(b"bytes from")
+    if sep:
+        out = reply
+    i = out.find(b"time=")
+    if i < 0:
+        i = out.find(b"time<")
+        if i < 0:
+            return None
+    i += 5
+    n = len(out)
+    while i < n and out[i] == 0x20:  # b" "
+        i += 1
+    j = i
+    while j < n and (0x30 <= out[j] <= 0x39 or out[j] == 0x2E):  # b"0"-b"9", b"."
+        j += 1
+    try:
+        return float(out[i:j])
+    except ValueError:
+        return None
 
 
 def _check_icmp() -> ProtocolStatus:
@@ -90,11 +117,23 @@ def _check_icmp() -> ProtocolStatus:
         return ProtocolStatus(status="unknown", checked_ts=ts, message="not configured")
 
     timeout_s = max(1, int(float(settings.icmp_timeout_seconds) or 1))
+
+    if icmp_ping is not None:
+        # In-process unprivileged ICMP; falls through to the ping binary if the
+        # kernel does not allow it (net.ipv4.ping_group_range).
+        try:
+            r = icmp_ping(host, count=1, timeout=timeout_s, privileged=False)
+        except Exception:
+            r = None
+        if r is not None:
+            if not r.is_alive:
+                return ProtocolStatus(status="crit", checked_ts=ts, message=f"{host}: no reply")
+            return _icmp_latency_status(ts, host, float(r.avg_rtt))
+
     try:
         proc = subprocess.run(
             ["ping", "-c", "1", "-W", str(timeout_s), "-n", host],
             capture_output=True,
-            text=True,
             timeout=float(timeout_s) + 0.5,
             check=False,
         )
@@ -102,16 +141,18 @@ def _check_icmp() -> ProtocolStatus:
         return ProtocolStatus(status="crit", checked_ts=ts, message=f"ping failed: {e}")
 
     if proc.returncode != 0:
-        msg = (proc.stderr or proc.stdout or "").strip()
+        msg = (proc.stderr or proc.stdout or b"").decode("utf-8", errors="replace").strip()
         msg = msg[:140] if msg else "no reply"
         return ProtocolStatus(status="crit", checked_ts=ts, message=f"{host}: {msg}")
 
-    out = (proc.stdout or "") + "\n" + (proc.stderr or "")
-    m = _PING_RE.search(out)
-    latency_ms = float(m.group(1)) if m else None
+    latency_ms = parse_ping_rtt(proc.stdout or b"")
 
     if latency_ms is None:
         return ProtocolStatus(status="ok", checked_ts=ts, message=host)
+    return _icmp_latency_status(ts, host, latency_ms)
+
+
+def _icmp_latency_status(ts: float, host: str, latency_ms: float) -> ProtocolStatus:
     if latency_ms <= 100.0:
         status = "ok"
     elif latency_ms <= 250.0:
@@ -195,23 +236,27 @@ def start_protocol_checker() -> None:
     _task = asyncio.create_task(_loop(), name="protocol-checker")
 
 
+_CHECKS = (
+    ("ntp", _check_ntp),
+    ("icmp", _check_icmp),
+    ("snmp", _check_snmp),
+    ("netflow", _check_netflow_port),
+)
+
+
 async def _loop() -> None:
     await asyncio.sleep(0.5)
 
     while True:
-        try:
-            # Run checks off-thread so we don't block the event loop.
-            ntp = await asyncio.to_thread(_check_ntp)
-            icmp = await asyncio.to_thread(_check_icmp)
-            snmp = await asyncio.to_thread(_check_snmp)
-            netflow = await asyncio.to_thread(_check_netflow_port)
-
-            _set("ntp", ntp)
-            _set("icmp", icmp)
-            _set("snmp", snmp)
-            _set("netflow", netflow)
-        except Exception as e:
-            ts = _now()
-            _set("ntp", ProtocolStatus(status="unknown", checked_ts=ts, message=f"checker error: {e}"))
+        # Run the independent checks off-thread and concurrently, so a cycle
+        # takes as long as the slowest probe rather than the sum of all four.
+        results = await asyncio.gather(
+            *(asyncio.to_thread(check) for _name, check in _CHECKS),
+            return_exceptions=True,
+        )
+        for (name, _check), st in zip(_CHECKS, results):
+            if isinstance(st, BaseException):
+                st = ProtocolStatus(status="unknown", checked_ts=_now(), message=f"checker error: {st}")
+            _set(name, st)
 
         await asyncio.sleep(max(5.0, float(settings.protocol_check_interval_seconds)))
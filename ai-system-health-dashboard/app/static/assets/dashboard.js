@@ -2570,11 +2570,63 @@
     }
   }
 
+  function handleWsMessage(msg) {
+    if (!msg) return;
+    if (msg.type === 'log') {
+      handleBackendLogEvent(msg);
+    } else if (msg.type === 'host_event') {
+      // Structured per-host event (recent failures/recoveries).
+      handleHostEventForLogs(msg);
+      try {
+        if (!Array.isArray(recentHostEvents)) recentHostEvents = [];
+        recentHostEvents.push(msg);
+        // Keep a bounded client-side buffer too.
+        if (recentHostEvents.length > 500) recentHostEvents.splice(0, recentHostEvents.length - 500);
+      } catch (_) {
+        // ignore
+      }
+      // If the Problems view is active, refresh the events list.
+      try {
+        if (String(document.body.dataset.view || '') === 'problems') {
+          renderRecentEvents();
+        }
+      } catch (_) {
+        // ignore
+      }
+    } else if (msg.type === 'snapshot' || msg.type === 'sample') {
+      render(msg.sample, msg.insights);
+      // If Problems is visible, refresh system problems derived from the latest sample.
+      try {
+        if (String(document.body.dataset.view || '') === 'problems') {
+          renderProblemsView();
+        }
+      } catch (_) {
+        // ignore
+      }
+    } else if (msg.type === 'host_status') {
+      hostStatuses = (msg && msg.statuses && typeof msg.statuses === 'object') ? msg.statuses : {};
+      hostChecks = (msg && msg.checks && typeof msg.checks === 'object') ? msg.checks : {};
+      renderHostButtons();
+      updateHostsProtocolsLive();
+      try {
+        if (String(document.body.dataset.view || '') === 'problems') {
+          renderProblemsView();
+        }
+      } catch (_) {
+        // ignore
+      }
+    }
+  }
+
+  const wsDecoder = new TextDecoder();
+
   function connectWS() {
     clearWsTimers();
 
     const proto = location.protocol === 'https:' ? 'wss' : 'ws';
     ws = new WebSocket(`${proto}://${location.host}/ws/metrics`);
+    // Server pushes UTF-8 JSON as binary frames.
+    ws.binaryType = 'arraybuffer';
     setConn('connecting…');
 
     ws.onopen = () => {
@@ -2599,49 +2651,15 @@
 
     ws.onmessage = (evt) => {
       try {
-        const msg = JSON.parse(evt.data);
-        if (msg.type === 'log') {
-          handleBackendLogEvent(msg);
-        } else if (msg.type === 'host_event') {
-          // Structured per-host event (recent failures/recoveries).
-          handleHostEventForLogs(msg);
-          try {
-            if (!Array.isArray(recentHostEvents)) recentHostEvents = [];
-            recentHostEvents.push(msg);
-            // Keep a bounded client-side buffer too.
-            if (recentHostEvents.length > 500) recentHostEvents.splice(0, recentHostEvents.length - 500);
-          } catch (_) {
-            // ignore
-          }
-          // If the Problems view is active, refresh the events list.
-          try {
-            if (String(document.body.dataset.view || '') === 'problems') {
-              renderRecentEvents();
-            }
-          } catch (_) {
-            // ignore
-          }
-        } else if (msg.type === 'snapshot' || msg.type === 'sample') {
-          render(msg.sample, msg.insights);
-          // If Problems is visible, refresh system problems derived from the latest sample.
+        const raw = typeof evt.data === 'string' ? evt.data : wsDecoder.decode(evt.data);
+        const data = JSON.parse(raw);
+        // The server coalesces bursts into a single {"batch": [...]} frame.
+        const msgs = Array.isArray(data && data.batch) ? data.batch : [data];
+        for (const msg of msgs) {
           try {
-            if (String(document.body.dataset.view || '') === 'problems') {
-              renderProblemsView();
-            }
+            handleWsMessage(msg);
           } catch (_) {
-            // ignore
-          }
-        } else if (msg.type === 'host_status') {
-          hostStatuses = (msg && msg.statuses && typeof msg.statuses === 'object') ? msg.statuses : {};
-          hostChecks = (msg && msg.checks && typeof msg.checks === 'object') ? msg.checks : {};
-          renderHostButtons();
-          updateHostsProtocolsLive();
-          try {
-            if (String(document.body.dataset.view || '') === 'problems') {
-              renderProblemsView();
-            }
-          } catch (_) {
-            // ignore
+            // ignore; keep processing the rest of the batch
           }
         }
       } catch (_) {
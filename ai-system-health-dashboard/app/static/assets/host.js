@@ -561,10 +561,13 @@
   }
 
   let wsPingTimer = null;
+  const wsDecoder = new TextDecoder();
 
   function connectWS(hostId) {
     const proto = location.protocol === 'https:' ? 'wss' : 'ws';
     const ws = new WebSocket(`${proto}://${location.host}/ws/metrics`);
+    // Server pushes UTF-8 JSON as binary frames.
+    ws.binaryType = 'arraybuffer';
     if (wsPingTimer) { clearInterval(wsPingTimer); wsPingTimer = null; }
 
     ws.onopen = () => { const el = $$('hostConn'); if (el) el.textContent = 'live'; };
@@ -576,8 +579,12 @@
     ws.onerror = () => { try { ws.close(); } catch(_) {} };
     ws.onmessage = (evt) => {
       try {
-        const msg = JSON.parse(evt.data);
-        if (msg.type === 'host_status') {
+        const raw = typeof evt.data === 'string' ? evt.data : wsDecoder.decode(evt.data);
+        const data = JSON.parse(raw);
+        // Bursts arrive coalesced as {"batch": [...]}.
+        const msgs = Array.isArray(data && data.batch) ? data.batch : [data];
+        for (const msg of msgs) {
+          if (!msg || msg.type !== 'host_status') continue;
           const st = (msg.statuses || {})[String(hostId)] || (msg.statuses || {})[hostId] || null;
           if (st) applyStatus(st);
           const checks = (msg.checks || {})[String(hostId)] || (msg.checks || {})[hostId] || null;
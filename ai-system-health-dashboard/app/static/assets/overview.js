@@ -277,6 +277,7 @@
   }
 
   let ws = null;
+  const wsDecoder = new TextDecoder();
   let wsPingTimer = null;
   let wsFallbackTimer = null;
 
@@ -296,6 +297,8 @@
 
     const proto = location.protocol === 'https:' ? 'wss' : 'ws';
     ws = new WebSocket(`${proto}://${location.host}/ws/metrics`);
+    // Server pushes UTF-8 JSON as binary frames.
+    ws.binaryType = 'arraybuffer';
     setConn('connecting…');
 
     ws.onopen = () => {
@@ -319,8 +322,15 @@
 
     ws.onmessage = async (evt) => {
       try {
-        const msg = JSON.parse(evt.data);
-        if (msg.type === 'snapshot' || msg.type === 'sample') {
+        const raw = typeof evt.data === 'string' ? evt.data : wsDecoder.decode(evt.data);
+        const data = JSON.parse(raw);
+        // Bursts arrive coalesced as {"batch": [...]}; only the newest sample matters here.
+        const msgs = Array.isArray(data && data.batch) ? data.batch : [data];
+        let msg = null;
+        for (const m of msgs) {
+          if (m && (m.type === 'snapshot' || m.type === 'sample')) msg = m;
+        }
+        if (msg) {
           if (msg.sample && msg.sample.ts) render(msg.sample, msg.insights);
           await refreshInventoryAndDb();
           setErr('');
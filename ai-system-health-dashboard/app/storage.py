@@ -2,10 +2,12 @@ from __future__ import annotations
 
 import asyncio
 import json
+import logging
 import os
 import sqlite3
 import threading
 import time
+from collections import deque
 from pathlib import Path
 from typing import Optional
 
@@ -32,6 +34,9 @@ class SQLiteMetricsStorage:
         conn = sqlite3.connect(str(path), check_same_thread=False)
         conn.execute("PRAGMA journal_mode=WAL;")
         conn.execute("PRAGMA synchronous=NORMAL;")
+        conn.execute("PRAGMA busy_timeout=5000;")
+        conn.execute("PRAGMA temp_store=MEMORY;")
+        conn.execute("PRAGMA mmap_size=268435456;")
         conn.execute(
             """
             CREATE TABLE IF NOT EXISTS samples (
@@ -104,6 +109,22 @@ class SQLiteMetricsStorage:
             )
             conn.commit()
 
+    def insert_samples(self, samples: list[SystemSample]) -> None:
+        """Write several samples in a single transaction."""
+        if not self.enabled or not samples:
+            return
+        conn = self._require_conn()
+        rows = [
+            (float(s.ts), json.dumps(s.model_dump(), separators=(",", ":")))
+            for s in samples
+        ]
+        with self._lock:
+            conn.executemany(
+                "INSERT OR REPLACE INTO samples (ts, sample_json) VALUES (?, ?)",
+                rows,
+            )
+            conn.commit()
+
     def query_latest(self) -> Optional[SystemSample]:
         if not self.enabled:
             return None
@@ -197,29 +218,42 @@ class SQLiteMetricsStorage:
         )
         with self._lock:
             rows = conn.execute(sql).fetchall()
-        out: list[Host] = []
-        for row in rows:
-            (hid, name, address, htype, tags_json, notes, is_active, created_ts) = row
-            tags: list[str] = []
-            try:
-                parsed = json.loads(tags_json or "[]")
-                if isinstance(parsed, list):
-                    tags = [str(t) for t in parsed if str(t).strip()]
-            except Exception:
-                tags = []
-            out.append(
-                Host(
-                    id=int(hid),
-                    name=str(name),
-                    address=str(address),
-                    type=str(htype) if htype is not None and str(htype).strip() != "" else None,
-                    tags=tags,
-                    notes=str(notes) if notes is not None and str(notes).strip() != "" else None,
-                    is_active=bool(int(is_active) if is_active is not None else 0),
-                    created_ts=float(created_ts),
-                )
-            )
-        return out
+        return [self._row_to_host(row) for row in rows]
+
+    def get_host(self, host_id: int) -> Optional[Host]:
+        if not self.enabled:
+            return None
+        conn = self._require_conn()
+        with self._lock:
+            row = conn.execute(
+                "SELECT id, name, address, type, tags_json, notes, is_active, created_ts "
+                "FROM hosts WHERE id = ?",
+                (int(host_id),),
+            ).fetchone()
+        if not row:
+            return None
+        return self._row_to_host(row)
+
+    @staticmethod
+    def _row_to_host(row: tuple) -> Host:
+        (hid, name, address, htype, tags_json, notes, is_active, created_ts) = row
+        tags: list[str] = []
+        try:
+            parsed = json.loads(tags_json or "[]")
+            if isinstance(parsed, list):
+                tags = [str(t) for t in parsed if str(t).strip()]
+        except Exception:
+            tags = []
+        return Host(
+            id=int(hid),
+            name=str(name),
+            address=str(address),
+            type=str(htype) if htype is not None and str(htype).strip() != "" else None,
+            tags=tags,
+            notes=str(notes) if notes is not None and str(notes).strip() != "" else None,
+            is_active=bool(int(is_active) if is_active is not None else 0),
+            created_ts=float(created_ts),
+        )
 
     def create_host(self, host_in: HostCreate) -> Host:
         if not self.enabled:
@@ -254,6 +288,51 @@ class SQLiteMetricsStorage:
             created_ts=float(now),
         )
 
+    def create_hosts(self, hosts_in: list[HostCreate]) -> list[Host]:
+        """Insert several hosts in a single transaction."""
+        if not self.enabled:
+            raise RuntimeError("Host storage is disabled (metrics DB path not set)")
+        if not hosts_in:
+            return []
+        conn = self._require_conn()
+        now = float(time.time())
+        hosts: list[Host] = []
+        with self._lock:
+            try:
+                for host_in in hosts_in:
+                    tags = [str(t).strip() for t in (host_in.tags or []) if str(t).strip()]
+                    htype = str(host_in.type).strip() if host_in.type is not None and str(host_in.type).strip() != "" else None
+                    notes = str(host_in.notes) if host_in.notes is not None and str(host_in.notes).strip() != "" else None
+                    cur = conn.execute(
+                        "INSERT INTO hosts (name, address, type, tags_json, notes, is_active, created_ts) "
+                        "VALUES (?, ?, ?, ?, ?, 1, ?)",
+                        (
+                            str(host_in.name).strip(),
+                            str(host_in.address).strip(),
+                            htype,
+                            json.dumps(tags, separators=(",", ":")),
+                            notes,
+                            now,
+                        ),
+                    )
+                    hosts.append(
+                        Host(
+                            id=int(cur.lastrowid),
+                            name=str(host_in.name).strip(),
+                            address=str(host_in.address).strip(),
+                            type=htype,
+                            tags=tags,
+                            notes=notes,
+                            is_active=True,
+                            created_ts=now,
+                        )
+                    )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        return hosts
+
     def update_host(self, host_id: int, host_in: "HostCreate") -> "Host | None":
         if not self.enabled:
             return None
@@ -273,18 +352,16 @@ class SQLiteMetricsStorage:
                 ),
             )
             conn.commit()
-        if not (cur.rowcount or 0):
-            return None
-        rows = conn.execute("SELECT id, name, address, type, tags_json, notes, is_active, created_ts FROM hosts WHERE id=?", (int(host_id),)).fetchone()
-        if not rows:
+            if not (cur.rowcount or 0):
+                return None
+            row = conn.execute(
+                "SELECT id, name, address, type, tags_json, notes, is_active, created_ts "
+                "FROM hosts WHERE id = ?",
+                (int(host_id),),
+            ).fetchone()
+        if not row:
             return None
-        (hid, name, address, htype, tj, notes, is_active, created_ts) = rows
-        try:
-            parsed_tags = json.loads(tj or "[]")
-        except Exception:
-            parsed_tags = []
-        from .models import Host
-        return Host(id=int(hid), name=str(name), address=str(address), type=htype or None, tags=parsed_tags, notes=notes or None, is_active=bool(is_active), created_ts=float(created_ts))
+        return self._row_to_host(row)
 
     def deactivate_host(self, host_id: int) -> bool:
         if not self.enabled:
@@ -377,22 +454,101 @@ async def init_storage() -> None:
     await asyncio.to_thread(storage.init)
 
 
+# Samples are buffered and written in batches; one commit (and fsync) per flush.
+# The queue is capped so a persistently failing DB (locked, disk full) drops
+# the oldest samples instead of growing without bound.
+_PENDING_SAMPLES_MAX = 3600
+_pending_samples: deque[SystemSample] = deque(maxlen=_PENDING_SAMPLES_MAX)
+_flush_task: Optional[asyncio.Task] = None
+
+
 async def persist_sample(sample: SystemSample) -> None:
+    """Queue a sample for the background flusher."""
     if not storage.enabled:
         return
-    await asyncio.to_thread(storage.insert_sample, sample)
+    _pending_samples.append(sample)
+
+
+async def flush_samples() -> int:
+    """Write all queued samples now. Returns the number written."""
+    if not storage.enabled or not _pending_samples:
+        return 0
+    batch = list(_pending_samples)
+    await asyncio.to_thread(storage.insert_samples, batch)
+    # Drop only what was written, and only once it is readable from the DB,
+    # so readers merging _pending_samples never miss an in-flight batch.
+    last_ts = batch[-1].ts
+    while _pending_samples and _pending_samples[0].ts <= last_ts:
+        _pending_samples.popleft()
+    return len(batch)
+
+
+def with_pending_samples(samples: list[SystemSample], seconds: int) -> list[SystemSample]:
+    """Append queued-but-unflushed samples newer than the DB rows in ``samples``.
+
+    Samples are keyed by ts in the DB, so anything at or before the last row
+    is already persisted (e.g. a batch being flushed right now).
+    """
+    if not _pending_samples:
+        return samples
+    last_ts = samples[-1].ts if samples else float("-inf")
+    cutoff = time.time() - max(1, int(seconds))
+    samples.extend(s for s in list(_pending_samples) if s.ts > last_ts and s.ts >= cutoff)
+    return samples
+
+
+async def _flush_loop() -> None:
+    while True:
+        await asyncio.sleep(max(0.1, float(settings.sqlite_flush_interval_seconds)))
+        try:
+            await flush_samples()
+        except Exception:
+            logging.getLogger("uvicorn").exception(
+                "Flushing %d queued samples failed", len(_pending_samples)
+            )
+
+
+def start_sample_flusher() -> None:
+    """Start the background sample flusher task (idempotent)."""
+    global _flush_task
+    if not storage.enabled:
+        return
+    if _flush_task is not None and not _flush_task.done():
+        return
+    _flush_task = asyncio.create_task(_flush_loop(), name="sample-flusher")
+
+
+async def stop_sample_flusher() -> None:
+    """Stop the flusher and write whatever is still queued."""
+    global _flush_task
+    task, _flush_task = _flush_task, None
+    if task is not None:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    try:
+        await flush_samples()
+    except Exception:
+        logging.getLogger("uvicorn").exception(
+            "Flushing %d queued samples at shutdown failed", len(_pending_samples)
+        )
 
 
 async def get_latest() -> Optional[SystemSample]:
     if not storage.enabled:
         return None
+    if _pending_samples:
+        return _pending_samples[-1]
     return await asyncio.to_thread(storage.query_latest)
 
 
 async def get_history(seconds: int) -> list[SystemSample]:
     if not storage.enabled:
         return []
-    return await asyncio.to_thread(storage.query_history, seconds)
+    samples = await asyncio.to_thread(storage.query_history, seconds)
+    return with_pending_samples(samples, seconds)
 
 
 async def update_host(host_id: int, host_in: "HostCreate") -> "Host | None":
@@ -423,12 +579,24 @@ async def get_hosts(active_only: bool = True) -> list[Host]:
     return await asyncio.to_thread(storage.list_hosts, bool(active_only))
 
 
+async def get_host_by_id(host_id: int) -> Optional[Host]:
+    if not storage.enabled:
+        return None
+    return await asyncio.to_thread(storage.get_host, int(host_id))
+
+
 async def create_host(host_in: HostCreate) -> Host:
     if not storage.enabled:
         raise RuntimeError("Host storage is disabled (metrics DB path not set)")
     return await asyncio.to_thread(storage.create_host, host_in)
 
 
+async def create_hosts(hosts_in: list[HostCreate]) -> list[Host]:
+    if not storage.enabled:
+        raise RuntimeError("Host storage is disabled (metrics DB path not set)")
+    return await asyncio.to_thread(storage.create_hosts, list(hosts_in))
+
+
 async def deactivate_host(host_id: int) -> bool:
     if not storage.enabled:
         return False
@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Settings are read once at import time, so point the databases at a scratch
+# directory before anything under app/ is imported.
+_TMP_DIR = tempfile.mkdtemp(prefix="ashd-tests-")
+os.environ.setdefault("METRICS_DB_PATH", os.path.join(_TMP_DIR, "metrics.db"))
+os.environ.setdefault("AUTH_DB_PATH", os.path.join(_TMP_DIR, "auth.db"))
+os.environ.setdefault("SESSION_SECRET_KEY", "test-secret-key")
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
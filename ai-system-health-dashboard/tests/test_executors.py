@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import asyncio
+
+from app import main
+
+
+def _answer() -> int:
+    return 42
+
+
+def test_auth_pools_survive_app_shutdown():
+    async def call():
+        return await main._run_auth(_answer), await main._run_auth_write(_answer)
+
+    assert asyncio.run(call()) == (42, 42)
+    # A shutdown hook followed by another lifespan in the same process.
+    main._shutdown_executors()
+    assert asyncio.run(call()) == (42, 42)
+
+
+def test_probe_pool_survives_app_shutdown(monkeypatch):
+    ok = main.ProtocolStatus(status="ok")
+    monkeypatch.setattr(main, "_check_blocking_protocols", lambda address, done: (ok, ok, ok))
+
+    async def probe():
+        return await main._blocking_probes_with_timeout("192.0.2.1")
+
+    assert asyncio.run(probe()) == (ok, ok, ok)
+    main._shutdown_executors()
+    assert asyncio.run(probe()) == (ok, ok, ok)
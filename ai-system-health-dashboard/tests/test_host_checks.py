@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+from app import main
+from app.models import ProtocolStatus
+
+
+def _ok(message: str) -> ProtocolStatus:
+    return ProtocolStatus(status="ok", checked_ts=time.time(), message=message)
+
+
+def test_overrun_keeps_finished_hosts_and_marks_unfinished_unknown():
+    async def fast():
+        st = _ok("fast").model_dump()
+        return (1, {"icmp": st, "checks": {"icmp": st}})
+
+    async def slow():
+        await asyncio.sleep(30)
+        return (2, {})
+
+    pairs = dict(asyncio.run(main._gather_host_checks({1: fast(), 2: slow()}, 0.05)))
+
+    assert pairs[1]["icmp"]["status"] == "ok"
+    assert pairs[1]["icmp"]["message"] == "fast"
+    assert pairs[2]["icmp"]["status"] == "unknown"
+    assert {st["status"] for st in pairs[2]["checks"].values()} == {"unknown"}
+
+
+def test_blocking_probe_timeout_keeps_finished_probes(monkeypatch):
+    def slow_snmp(address):
+        time.sleep(0.3)
+        return _ok("snmp")
+
+    monkeypatch.setattr(main, "_check_tcp_port", lambda address, port, timeout_s: _ok("ssh"))
+    monkeypatch.setattr(main, "_check_snmp_host", slow_snmp)
+    monkeypatch.setattr(main, "_check_ntp_server", lambda address: _ok("ntp"))
+    monkeypatch.setattr(main, "_BLOCKING_PROBES_TIMEOUT_S", 0.1)
+
+    ssh, snmp, ntp = asyncio.run(main._blocking_probes_with_timeout("192.0.2.1"))
+
+    assert ssh.status == "ok"
+    assert snmp.status == "unknown"
+    assert ntp.status == "unknown"
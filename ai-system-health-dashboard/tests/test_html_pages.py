@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import os
+
+from app import main
+
+
+def test_etag_matches_lists_and_weak_validators():
+    etag = '"abc123"'
+    assert main._etag_matches(etag, etag)
+    assert main._etag_matches('"other", "abc123"', etag)
+    assert main._etag_matches('W/"abc123"', etag)
+    assert main._etag_matches("*", etag)
+    assert not main._etag_matches('"other"', etag)
+    assert not main._etag_matches(None, etag)
+    assert not main._etag_matches("", etag)
+
+
+def test_html_page_cache_rereads_edited_file(tmp_path):
+    page = tmp_path / "page.html"
+    page.write_bytes(b"<p>old</p>")
+    content, etag = main._load_html_page(str(page))
+    assert content == b"<p>old</p>"
+
+    page.write_bytes(b"<p>new</p>")
+    st = page.stat()
+    os.utime(page, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+    content2, etag2 = main._load_html_page(str(page))
+    assert content2 == b"<p>new</p>"
+    assert etag2 != etag
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import asyncio
+import io
+import os
+
+from app import main
+from app import storage
+from app.models import HostCreate
+
+
+class _FakeProc:
+    returncode = 0
+
+    async def communicate(self, input=None):
+        return b"installing...\nREAL_HOSTNAME=web01.example\n", b""
+
+
+def test_install_agent_renames_host(monkeypatch):
+    asyncio.run(storage.init_storage())
+    host = storage.storage.create_host(HostCreate(name="10.0.0.5", address="10.0.0.5", type="linux"))
+
+    async def fake_exec(*args, **kwargs):
+        return _FakeProc()
+
+    monkeypatch.setattr(os.path, "exists", lambda path: True)
+    monkeypatch.setattr(main, "open", lambda *a, **kw: io.StringIO("# agent\n"), raising=False)
+    monkeypatch.setattr(asyncio, "create_subprocess_exec", fake_exec)
+
+    result = asyncio.run(main.api_admin_hosts_install_agent(host.id, {"ssh_password": "secret"}))
+
+    assert result["ok"] is True
+    assert result["hostname"] == "web01.example"
+    renamed = storage.storage.get_host(host.id)
+    assert renamed is not None
+    assert renamed.name == "web01.example"
+    assert renamed.address == "10.0.0.5"
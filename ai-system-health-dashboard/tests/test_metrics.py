@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import io
+
+from app import metrics
+
+
+class _FakePopen:
+    def __init__(self, *args, **kwargs):
+        self.stdout = io.StringIO("")
+        self.killed = False
+
+    def poll(self):
+        return 0 if self.killed else None
+
+    def kill(self):
+        self.killed = True
+
+
+def test_smi_stream_registers_one_atexit_hook_across_restarts(monkeypatch):
+    hooks = []
+    monkeypatch.setattr(metrics.atexit, "register", hooks.append)
+    monkeypatch.setattr(metrics.subprocess, "Popen", _FakePopen)
+
+    stream = metrics._NvidiaSmiStream()
+    stream._start()
+    stream._start()
+
+    assert len(hooks) == 1
+    hooks[0]()
+    assert stream._proc.killed
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+from app import storage
+from app.models import NetIO, SystemSample
+
+
+def _sample(ts: float) -> SystemSample:
+    return SystemSample(
+        ts=ts,
+        hostname="test-host",
+        cpu_percent=12.5,
+        mem_total_bytes=1024,
+        mem_used_bytes=512,
+        mem_available_bytes=512,
+        mem_percent=50.0,
+        swap_total_bytes=0,
+        swap_used_bytes=0,
+        swap_percent=0.0,
+        disk=[],
+        net=NetIO(bytes_sent=0, bytes_recv=0),
+    )
+
+
+def test_persisted_sample_is_readable_before_flush():
+    async def scenario():
+        await storage.init_storage()
+        flushed = _sample(time.time() - 5)
+        await storage.persist_sample(flushed)
+        await storage.flush_samples()
+
+        pending = _sample(time.time())
+        await storage.persist_sample(pending)
+        # No flusher tick in between: the sample is still only queued.
+        return await storage.get_history(60), await storage.get_latest(), pending, flushed
+
+    history, latest, pending, flushed = asyncio.run(scenario())
+
+    assert [s.ts for s in history][-2:] == [flushed.ts, pending.ts]
+    assert latest is not None and latest.ts == pending.ts
+    asyncio.run(storage.flush_samples())
+    assert [s.ts for s in asyncio.run(storage.get_history(60))][-2:] == [flushed.ts, pending.ts]
+
+
+def test_failed_flush_keeps_samples_queued(monkeypatch):
+    asyncio.run(storage.init_storage())
+    sample = _sample(time.time())
+    asyncio.run(storage.persist_sample(sample))
+
+    def fail(samples):
+        raise RuntimeError("database is locked")
+
+    with monkeypatch.context() as m:
+        m.setattr(storage.storage, "insert_samples", fail)
+        try:
+            asyncio.run(storage.flush_samples())
+        except RuntimeError:
+            pass
+
+    assert storage._pending_samples[-1].ts == sample.ts
+    assert storage._pending_samples.maxlen == storage._PENDING_SAMPLES_MAX
+    assert asyncio.run(storage.flush_samples()) >= 1
+    assert not storage._pending_samples